@@ -0,0 +1,26 @@
+# blog/management/commands/backfill_article_stats.py
+from django.core.management.base import BaseCommand
+
+from blog.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored word_count and read_time for every article'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        batch, updated = [], 0
+        articles = Article.objects.only('id', 'content', 'word_count', 'read_time')
+        for article in articles.iterator(chunk_size=batch_size):
+            old_stats = (article.word_count, article.read_time)
+            article.update_reading_stats()
+            if (article.word_count, article.read_time) != old_stats:
+                batch.append(article)
+            if len(batch) >= batch_size:
+                updated += Article.objects.bulk_update(batch, ['word_count', 'read_time'])
+                batch = []
+        if batch:
+            updated += Article.objects.bulk_update(batch, ['word_count', 'read_time'])
+        self.stdout.write(self.style.SUCCESS(f'Updated reading stats for {updated} articles'))
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from runpace_pro.search import SearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        SearchIndex(
+            "blog_article", {"title": "A", "keywords": "B", "content": "D"}
+        ).migration_operation(),
+    ]
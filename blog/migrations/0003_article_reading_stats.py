@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0002_article_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="read_time",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, help_text="Minutes"
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_article_reading_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["status", "-published_at", "-created_at", "-id"],
+                name="blog_articl_status_4ac516_idx",
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.urls import reverse
+from runpace_pro.search import SearchIndex
 
 User = get_user_model()
 
@@ -25,8 +26,18 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class ArticleQuerySet(models.QuerySet):
+    def tagged(self, slug):
+        """Articles with the tag, filtered with EXISTS so no DISTINCT is needed"""
+        taggings = ArticleTag.articles.through.objects.filter(
+            article=models.OuterRef('pk'), articletag__slug=slug
+        )
+        return self.filter(models.Exists(taggings))
+
 class Article(models.Model):
     """Blog articles and educational content"""
+    WORDS_PER_MINUTE = 200
+    
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -61,25 +72,47 @@ class Article(models.Model):
     # Analytics
     view_count = models.PositiveIntegerField(default=0)
     
+    # Reading stats, kept in sync with content on save
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    read_time = models.PositiveIntegerField(default=1, editable=False, help_text="Minutes")
+    
+    objects = ArticleQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-published_at', '-created_at']
         indexes = [
             models.Index(fields=['status', 'published_at']),
             models.Index(fields=['category', 'status']),
             models.Index(fields=['is_featured', 'status']),
+            # Keyset pagination of published articles (ArticleCursorPagination)
+            models.Index(fields=['status', '-published_at', '-created_at', '-id']),
         ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get('update_fields')
+        if 'content' not in self.get_deferred_fields() and (
+                update_fields is None or 'content' in update_fields):
+            self.update_reading_stats()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'word_count', 'read_time'}
         super().save(*args, **kwargs)
     
+    def update_reading_stats(self):
+        """Recount words in content and derive the reading time"""
+        self.word_count = len(self.content.split())
+        self.read_time = max(1, self.word_count // self.WORDS_PER_MINUTE)
+    
     def get_absolute_url(self):
         return reverse('blog:article_detail', kwargs={'slug': self.slug})
     
     def __str__(self):
         return self.title
 
+# Full-text index behind ?search= on articles (see migration 0002)
+ARTICLE_SEARCH_INDEX = SearchIndex('blog_article', {'title': 'A', 'keywords': 'B', 'content': 'D'})
+
 class ArticleTag(models.Model):
     """Tags for articles"""
     name = models.CharField(max_length=50, unique=True)
@@ -23,12 +23,11 @@ class ArticleListSerializer(serializers.ModelSerializer):
         model = Article
         fields = ['id', 'title', 'slug', 'author_name', 'category_name', 'tags',
                  'excerpt', 'featured_image', 'published_at', 'view_count', 'read_time']
+        field_dependencies = {'read_time': ('read_time',)}
     
     def get_read_time(self, obj):
-        """Estimate reading time based on word count"""
-        word_count = len(obj.content.split())
-        read_time = max(1, word_count // 200)  # Assuming 200 words per minute
-        return f"{read_time} min read"
+        """Reading time stored on the article (200 words per minute)"""
+        return f"{obj.read_time} min read"
 
 class ArticleDetailSerializer(serializers.ModelSerializer):
     """Full serializer for article detail view"""
@@ -44,9 +43,7 @@ class ArticleDetailSerializer(serializers.ModelSerializer):
                  'published_at', 'view_count', 'read_time']
     
     def get_read_time(self, obj):
-        word_count = len(obj.content.split())
-        read_time = max(1, word_count // 200)
-        return f"{read_time} min read"
+        return f"{obj.read_time} min read"
 
 class NewsletterSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,18 @@
+# blog/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from runpace_pro.http_cache import invalidate_namespace
+from .models import Article, ArticleTag, Category
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ArticleTag)
+@receiver(post_delete, sender=ArticleTag)
+@receiver(m2m_changed, sender=ArticleTag.articles.through)
+def invalidate_blog_responses(sender, **kwargs):
+    """Drop cached blog catalog responses when articles or their taxonomy change"""
+    invalidate_namespace('blog')
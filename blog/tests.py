@@ -0,0 +1,56 @@
+# blog/tests.py
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .models import Article
+
+User = get_user_model()
+
+
+class ArticleReadingStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='writer', email='writer@example.com')
+
+    def create(self, words):
+        return Article.objects.create(title=f'Tempo runs {words}', author=self.author, excerpt='Excerpt',
+                                      content='word ' * words)
+
+    def test_stats_follow_the_content(self):
+        article = self.create(450)
+        self.assertEqual((article.word_count, article.read_time), (450, 2))
+        article.content = 'word ' * 50
+        article.save(update_fields=['content'])
+        article.refresh_from_db()
+        self.assertEqual((article.word_count, article.read_time), (50, 1))
+
+    def test_saves_without_the_content_keep_the_stats(self):
+        article = self.create(450)
+        article.title = 'Threshold runs'
+        article.word_count = 0
+        article.save(update_fields=['title'])
+        article.refresh_from_db()
+        self.assertEqual(article.word_count, 450)
+
+        deferred = Article.objects.defer('content').get(pk=article.pk)
+        deferred.title = 'Interval runs'
+        with self.assertNumQueries(1):
+            deferred.save()
+        article.refresh_from_db()
+        self.assertEqual((article.title, article.word_count, article.read_time), ('Interval runs', 450, 2))
+
+    def test_backfill_recomputes_stale_stats(self):
+        current = self.create(450)
+        stale = self.create(1000)
+        Article.objects.filter(pk=stale.pk).update(word_count=0, read_time=1)
+        out = StringIO()
+        call_command('backfill_article_stats', batch_size=1, stdout=out)
+        self.assertIn('Updated reading stats for 1 articles', out.getvalue())
+        stale.refresh_from_db()
+        self.assertEqual((stale.word_count, stale.read_time), (1000, 5))
+        current.refresh_from_db()
+        self.assertEqual((current.word_count, current.read_time), (450, 2))
@@ -1,11 +1,14 @@
 # blog/views.py
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, F
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from .models import Category, Article, ArticleTag, Newsletter
+from runpace_pro.counters import get_view_counter
+from runpace_pro.http_cache import cached_response
+from runpace_pro.pagination import KeysetPagination
+from runpace_pro.querysets import only_serialized
+from .models import Category, Article, ArticleTag, Newsletter, ARTICLE_SEARCH_INDEX
 from .serializers import (CategorySerializer, ArticleListSerializer, 
                          ArticleDetailSerializer, ArticleTagSerializer, 
                          NewsletterSerializer)
@@ -16,11 +19,19 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
+    
+    @cached_response('blog')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+class ArticleCursorPagination(KeysetPagination):
+    ordering = ('-published_at', '-created_at', '-id')
 
 class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
     """Blog articles"""
     queryset = Article.objects.filter(status='published')
     permission_classes = [AllowAny]
+    pagination_class = ArticleCursorPagination
     lookup_field = 'slug'
     
     def get_queryset(self):
@@ -28,26 +39,26 @@ class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
             'author', 'category'
         ).prefetch_related('tags')
         
+        # Listings only load the columns the list serializer renders (never the body)
+        if self.action != 'retrieve':
+            queryset = only_serialized(queryset, ArticleListSerializer)
+        
         # Filter by category
         category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category__slug=category)
         
-        # Filter by tag
+        # Filter by tag (EXISTS rather than a join, so rows aren't duplicated)
         tag = self.request.query_params.get('tag', None)
         if tag:
-            queryset = queryset.filter(tags__slug=tag)
+            queryset = queryset.tagged(tag)
         
-        # Search functionality
+        # Search functionality (ranked full-text search, best match first)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(content__icontains=search) |
-                Q(keywords__icontains=search)
-            )
+            queryset = ARTICLE_SEARCH_INDEX.search(queryset, search)
         
-        return queryset.distinct()
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -57,12 +68,15 @@ class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         """Get article detail and increment view count"""
         instance = self.get_object()
-        # Increment view count
-        Article.objects.filter(id=instance.id).update(view_count=F('view_count') + 1)
+        # Increment view count (buffered and flushed in batches)
+        counter = get_view_counter()
+        counter.increment(Article, instance.id)
+        instance.view_count += counter.pending(Article, instance.id)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('blog')
     def featured(self, request):
         """Get featured articles"""
         featured_articles = self.get_queryset().filter(is_featured=True)[:6]
@@ -70,6 +84,7 @@ class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('blog')
     def popular(self, request):
         """Get most popular articles"""
         popular_articles = self.get_queryset().order_by('-view_count')[:10]
@@ -3,4 +3,10 @@ from django.apps import AppConfig
 
 class CalculatorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'calculator' 
\ No newline at end of file
+    name = 'calculator'
+
+    def ready(self):
+        # Compile the VDOT chart at startup so a malformed chart fails fast
+        # and the first request doesn't pay for parsing it
+        from .vdot_chart import get_vdot_chart
+        get_vdot_chart()
@@ -0,0 +1,140 @@
+# calculator/environment.py
+"""Race-condition adjustments for temperature, humidity and hills
+
+A dense grid of time multipliers over temperature (F) x relative humidity
+(%) x elevation gain per mile (ft) is precomputed once. Lookups are O(1)
+trilinear interpolation on that grid and accept arrays, so a whole race
+history is adjusted in one call.
+
+- Heat follows the common temperature + dew point rule: no cost up to a
+  combined 100, rising to about 10% slower at 180.
+- Hills cost 1.5% per 100 ft of gain per mile, assuming the course loses
+  the elevation it gains.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from .services import VDOTCalculator
+from .vdot_chart import METERS_PER_MILE, PACE_ZONES, get_vdot_chart
+
+# Temperature + dew point (F) -> % slower, per the usual heat adjustment chart
+HEAT_INDEX_POINTS = (100, 110, 120, 130, 140, 150, 160, 170, 180)
+HEAT_SLOWDOWN_PERCENT = (0.0, 0.5, 1.0, 2.0, 3.0, 4.5, 6.0, 8.0, 10.0)
+HILL_COST_PER_FOOT_PER_MILE = 0.00015
+
+# Grid axes: (start, stop, step); inputs outside are clamped to the edges
+TEMPERATURE_AXIS = (-10.0, 110.0, 1.0)
+HUMIDITY_AXIS = (0.0, 100.0, 2.0)
+ELEVATION_AXIS = (0.0, 400.0, 10.0)
+
+# Assumed when a condition wasn't recorded; they add no time cost
+NEUTRAL_TEMPERATURE = 50.0
+NEUTRAL_HUMIDITY = 50.0
+NEUTRAL_ELEVATION = 0.0
+
+
+def dew_point(temperature, humidity):
+    """Dew point (F) from temperature (F) and relative humidity (%) by the Magnus formula"""
+    celsius = (np.asarray(temperature, dtype=np.float64) - 32) / 1.8
+    rh = np.clip(np.asarray(humidity, dtype=np.float64), 1.0, 100.0) / 100
+    gamma = np.log(rh) + 17.62 * celsius / (243.12 + celsius)
+    return 243.12 * gamma / (17.62 - gamma) * 1.8 + 32
+
+
+def heat_slowdown(temperature, humidity):
+    """Fractional slowdown from heat and humidity"""
+    combined = np.asarray(temperature, dtype=np.float64) + dew_point(temperature, humidity)
+    slowdown = np.interp(combined, HEAT_INDEX_POINTS, HEAT_SLOWDOWN_PERCENT)
+    # Keep climbing past the chart at its last slope (0.2% per point)
+    slowdown += np.maximum(combined - HEAT_INDEX_POINTS[-1], 0) * 0.2
+    return slowdown / 100
+
+
+def hill_slowdown(elevation_per_mile):
+    """Fractional slowdown from elevation gain (ft per mile)"""
+    return np.maximum(np.asarray(elevation_per_mile, dtype=np.float64), 0) * HILL_COST_PER_FOOT_PER_MILE
+
+
+class ConditionsGrid:
+    """Precomputed time multipliers (>= 1.0) for race conditions"""
+
+    def __init__(self, temperature_axis=TEMPERATURE_AXIS, humidity_axis=HUMIDITY_AXIS,
+                 elevation_axis=ELEVATION_AXIS):
+        self.axes = tuple(np.arange(start, stop + step / 2, step)
+                          for start, stop, step in (temperature_axis, humidity_axis, elevation_axis))
+        temperatures, humidities, elevations = np.meshgrid(*self.axes, indexing='ij')
+        self.factors = (1 + heat_slowdown(temperatures, humidities)) * (1 + hill_slowdown(elevations))
+
+    def time_factors(self, temperature=None, humidity=None, elevation_per_mile=None):
+        """Multiplier from flat, neutral-weather time to time in these conditions
+
+        Arguments broadcast against each other; None or NaN entries count as
+        neutral conditions.
+        """
+        values = np.broadcast_arrays(
+            _with_default(temperature, NEUTRAL_TEMPERATURE),
+            _with_default(humidity, NEUTRAL_HUMIDITY),
+            _with_default(elevation_per_mile, NEUTRAL_ELEVATION),
+        )
+        indexes, weights = zip(*(_locate(axis, value) for axis, value in zip(self.axes, values)))
+        (i, j, k), (wi, wj, wk) = indexes, weights
+
+        result = np.zeros(values[0].shape)
+        for di, fi in ((0, 1 - wi), (1, wi)):
+            for dj, fj in ((0, 1 - wj), (1, wj)):
+                for dk, fk in ((0, 1 - wk), (1, wk)):
+                    result += self.factors[i + di, j + dj, k + dk] * (fi * fj * fk)
+        return result
+
+    def normalize_times(self, times_seconds, temperature=None, humidity=None, elevation_per_mile=None):
+        """Equivalent flat, neutral-weather times for performances in these conditions"""
+        return np.asarray(times_seconds, dtype=np.float64) / self.time_factors(
+            temperature, humidity, elevation_per_mile)
+
+    def adjust_times(self, times_seconds, temperature=None, humidity=None, elevation_per_mile=None):
+        """Times (or paces) to expect in these conditions for a flat, neutral-weather effort"""
+        return np.asarray(times_seconds, dtype=np.float64) * self.time_factors(
+            temperature, humidity, elevation_per_mile)
+
+
+def _with_default(values, default):
+    values = np.asarray(default if values is None else values, dtype=np.float64)
+    return np.where(np.isnan(values), default, values)
+
+
+def _locate(axis, values):
+    """Lower grid index and interpolation weight for each value (clamped to the axis)"""
+    position = (np.clip(values, axis[0], axis[-1]) - axis[0]) / (axis[1] - axis[0])
+    index = np.minimum(position.astype(np.int64), len(axis) - 2)
+    return index, position - index
+
+
+@lru_cache(maxsize=None)
+def get_conditions_grid():
+    """Return the process-wide conditions grid"""
+    return ConditionsGrid()
+
+
+def gain_per_mile(elevation_gain, distances_meters):
+    """Average gain per mile (ft) from total course gain (ft)"""
+    gain = np.asarray(np.nan if elevation_gain is None else elevation_gain, dtype=np.float64)
+    return gain / (np.asarray(distances_meters, dtype=np.float64) / METERS_PER_MILE)
+
+
+def normalized_vdots(times_seconds, distances_meters, temperature=None, humidity=None, elevation_gain=None):
+    """VDOTs for races run in the given conditions, as if run flat in neutral weather
+
+    elevation_gain is the total course gain in feet.
+    """
+    flat_times = get_conditions_grid().normalize_times(
+        times_seconds, temperature, humidity, gain_per_mile(elevation_gain, distances_meters)
+    )
+    return VDOTCalculator.calculate_vdot_batch(flat_times, distances_meters)
+
+
+def adjusted_training_paces(vdots, temperature=None, humidity=None, elevation_per_mile=None):
+    """Training paces (seconds per mile) for VDOTs, slowed for the given conditions"""
+    factors = get_conditions_grid().time_factors(temperature, humidity, elevation_per_mile)
+    paces = get_vdot_chart().paces_for_vdot_batch(vdots)
+    return {zone: paces[zone] * factors for zone in PACE_ZONES}
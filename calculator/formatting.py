@@ -0,0 +1,98 @@
+# calculator/formatting.py
+"""Pace and race-time formatting shared by every calculator
+
+Paces are computed in seconds per mile throughout. Formatting converts
+them to the requested unit, rounds to the nearest second and reads the
+string out of a table built once at import, so a batch of paces is one
+NumPy index into that table instead of an f-string per pace.
+"""
+import math
+
+import numpy as np
+
+from .vdot_chart import METERS_PER_MILE
+
+# Pace unit -> meters it covers
+PACE_UNITS = {
+    'mile': METERS_PER_MILE,
+    'km': 1000,
+    '400m': 400,
+    'lap': 400,
+}
+DEFAULT_PACE_UNIT = 'mile'
+# User.preferred_units -> pace unit
+PREFERRED_PACE_UNITS = {
+    'imperial': 'mile',
+    'metric': 'km',
+}
+
+# Strings are precomputed for 0:00-59:59 per unit; slower paces are built on demand
+TABLE_SECONDS = 3600
+_CLOCK_STRINGS = np.array([f"{s // 60}:{s % 60:02d}" for s in range(TABLE_SECONDS)], dtype=object)
+# Track splits are called in plain seconds ("92"), 400m paces as M:SS ("1:32")
+_SECOND_STRINGS = np.array([str(s) for s in range(TABLE_SECONDS)], dtype=object)
+_TABLES = {unit: _SECOND_STRINGS if unit == 'lap' else _CLOCK_STRINGS for unit in PACE_UNITS}
+_SCALES = {unit: meters / METERS_PER_MILE for unit, meters in PACE_UNITS.items()}
+
+
+def pace_unit_for_user(user):
+    """Pace unit matching a user's preferred_units (the default for anonymous users)"""
+    return PREFERRED_PACE_UNITS.get(getattr(user, 'preferred_units', None), DEFAULT_PACE_UNIT)
+
+
+def resolve_pace_unit(unit=None, user=None):
+    """Validate a requested pace unit, falling back to the user's preference when none is given"""
+    if unit in (None, ''):
+        return pace_unit_for_user(user)
+    if not isinstance(unit, str) or unit not in PACE_UNITS:
+        raise ValueError('Invalid pace unit')
+    return unit
+
+
+def format_pace(seconds_per_mile, unit=DEFAULT_PACE_UNIT):
+    """Format a pace (seconds per mile) in `unit`, rounded to the nearest second"""
+    seconds = math.floor(seconds_per_mile * _SCALES[unit] + 0.5)
+    if 0 <= seconds < TABLE_SECONDS:
+        return _TABLES[unit][seconds]
+    return _format_slow_pace(seconds, unit)
+
+
+def pace_seconds_batch(seconds_per_mile, unit=DEFAULT_PACE_UNIT):
+    """Paces (seconds per mile) as whole seconds per `unit`, rounded like the formatters"""
+    return np.floor(np.asarray(seconds_per_mile, dtype=np.float64) * _SCALES[unit] + 0.5)
+
+
+def format_pace_batch(seconds_per_mile, unit=DEFAULT_PACE_UNIT):
+    """Format an array of paces (seconds per mile) in `unit` as a list of strings"""
+    seconds = pace_seconds_batch(seconds_per_mile, unit).ravel()
+    in_table = (seconds >= 0) & (seconds < TABLE_SECONDS)
+    formatted = _TABLES[unit][np.where(in_table, seconds, 0).astype(np.int64)].tolist()
+    for i in np.flatnonzero(~in_table).tolist():
+        formatted[i] = _format_slow_pace(seconds[i], unit)
+    return formatted
+
+
+def _format_slow_pace(seconds, unit):
+    if unit == 'lap':
+        return str(int(seconds))
+    return format_race_time(seconds)
+
+
+def format_race_time(seconds):
+    """Format a race time as H:MM:SS, or MM:SS under an hour"""
+    total = int(round(seconds))
+    hours, remainder = divmod(total, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def format_race_time_batch(seconds):
+    """Format an array of race times as a list of H:MM:SS / MM:SS strings"""
+    total = np.rint(np.asarray(seconds, dtype=np.float64)).astype(np.int64).ravel()
+    hours, remainder = np.divmod(total, 3600)
+    formatted = _CLOCK_STRINGS[remainder].tolist()
+    for i in np.flatnonzero(hours).tolist():
+        formatted[i] = f"{hours[i]}:{formatted[i].zfill(5)}"
+    return formatted
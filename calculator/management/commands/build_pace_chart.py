@@ -0,0 +1,24 @@
+# calculator/management/commands/build_pace_chart.py
+from django.core.management.base import BaseCommand
+
+from calculator.pace_chart import chart_dir, prune_pace_charts, write_pace_chart
+
+
+class Command(BaseCommand):
+    help = ('Render the VDOT pace chart (30-85 in 0.1 steps, every pace unit) into a '
+            'content-hashed JSON file and point the manifest at it')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='Defaults to settings.PACE_CHART["OUTPUT_DIR"]')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete older chart versions (clients may still hold their URLs)')
+
+    def handle(self, *args, output_dir, prune, **options):
+        output_dir = output_dir or chart_dir()
+        manifest = write_pace_chart(output_dir)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {manifest['file']} ({manifest['size'] / 1024:.1f} KB) to {output_dir}"
+        ))
+        if prune:
+            for name in prune_pace_charts(manifest['version'], output_dir):
+                self.stdout.write(f'Removed {name}')
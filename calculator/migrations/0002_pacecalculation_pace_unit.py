@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("calculator", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pacecalculation",
+            name="pace_unit",
+            field=models.CharField(
+                choices=[
+                    ("mile", "Per Mile"),
+                    ("km", "Per Kilometer"),
+                    ("400m", "Per 400m"),
+                    ("lap", "Per Lap"),
+                ],
+                default="mile",
+                max_length=10,
+            ),
+        ),
+    ]
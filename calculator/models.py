@@ -8,6 +8,12 @@ class PaceCalculation(models.Model):
         ('riegel', 'Riegel Formula'),
         ('cameron', 'Cameron Model'),
     ]
+    PACE_UNITS = [
+        ('mile', 'Per Mile'),
+        ('km', 'Per Kilometer'),
+        ('400m', 'Per 400m'),
+        ('lap', 'Per Lap'),
+    ]
     
     calculator_type = models.CharField(max_length=20, choices=CALCULATOR_TYPES)
     race_distance = models.CharField(max_length=20)
@@ -18,4 +24,5 @@ class PaceCalculation(models.Model):
     threshold_pace = models.CharField(max_length=10)
     interval_pace = models.CharField(max_length=10)
     repetition_pace = models.CharField(max_length=10)
+    pace_unit = models.CharField(max_length=10, choices=PACE_UNITS, default='mile')
     created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
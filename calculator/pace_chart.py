@@ -0,0 +1,125 @@
+# calculator/pace_chart.py
+"""Static pace chart for client-side lookups
+
+The chart holds every VDOT from 30 to 85 in 0.1 steps, with training paces
+in every pace unit and equivalent times at the standard race distances.
+It is rendered from the calculator engine into compact JSON named after
+a hash of its content. A rebuild with different numbers gets a new name,
+so the file can be cached as immutable; clients read the small manifest
+(see the version endpoint) to find the current one.
+"""
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+from django.conf import settings
+
+from .formatting import PACE_UNITS, pace_seconds_batch
+from .predictions import STANDARD_DISTANCES
+from .vdot_chart import MAX_VDOT, MIN_VDOT, PACE_ZONES, get_vdot_chart
+
+VDOT_STEP = 0.1
+# Bump when the JSON layout changes so clients can tell layouts apart
+FORMAT_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+CHART_NAME = re.compile(r'pace-chart\.(?P<version>[0-9a-f]{16})\.json')
+
+_manifests = {}
+
+
+def chart_dir():
+    return os.fspath(settings.PACE_CHART['OUTPUT_DIR'])
+
+
+def chart_filename(version):
+    return f'pace-chart.{version}.json'
+
+
+def build_pace_chart():
+    """The chart as a JSON-ready dict; every list has one entry per VDOT"""
+    steps = int(round((MAX_VDOT - MIN_VDOT) / VDOT_STEP))
+    vdots = np.round(MIN_VDOT + np.arange(steps + 1) * VDOT_STEP, 1)
+    chart = get_vdot_chart()
+    paces = chart.paces_for_vdot_batch(vdots)
+    times = chart.times_for_vdot(vdots, [meters for _, meters in STANDARD_DISTANCES])
+    return {
+        'format': FORMAT_VERSION,
+        'method': 'Daniels VDOT',
+        'vdot': {'min': MIN_VDOT, 'max': MAX_VDOT, 'step': VDOT_STEP},
+        'units': dict(PACE_UNITS),
+        # Whole seconds per unit, rounded the same way the API formats them
+        'paces': {
+            unit: {zone: pace_seconds_batch(paces[zone], unit).astype(np.int64).tolist() for zone in PACE_ZONES}
+            for unit in PACE_UNITS
+        },
+        'distances': [{'name': name, 'meters': meters} for name, meters in STANDARD_DISTANCES],
+        # Equivalent race times in whole seconds, by distance name
+        'race_times': {
+            name: np.rint(times[:, i]).astype(np.int64).tolist()
+            for i, (name, _) in enumerate(STANDARD_DISTANCES)
+        },
+    }
+
+
+def render_pace_chart():
+    """Return (version, JSON bytes); the version is a hash of the bytes"""
+    content = json.dumps(build_pace_chart(), separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return hashlib.sha256(content).hexdigest()[:16], content
+
+
+def write_pace_chart(output_dir=None):
+    """Write the chart and point the manifest at it; returns the manifest"""
+    output_dir = output_dir or chart_dir()
+    os.makedirs(output_dir, exist_ok=True)
+    version, content = render_pace_chart()
+    filename = chart_filename(version)
+    _write_atomic(os.path.join(output_dir, filename), content)
+    manifest = {'version': version, 'file': filename, 'size': len(content), 'format': FORMAT_VERSION}
+    _write_atomic(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def prune_pace_charts(keep_version, output_dir=None):
+    """Delete chart files other than `keep_version`; returns the names removed"""
+    output_dir = output_dir or chart_dir()
+    removed = []
+    for name in os.listdir(output_dir):
+        match = CHART_NAME.fullmatch(name)
+        if match and match['version'] != keep_version:
+            os.remove(os.path.join(output_dir, name))
+            removed.append(name)
+    return removed
+
+
+def load_manifest(output_dir=None):
+    """The current manifest, or None before the first build; re-read only when the file changes"""
+    path = os.path.join(output_dir or chart_dir(), MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _manifests.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as manifest_file:
+            cached = _manifests[path] = (mtime, json.load(manifest_file))
+    return cached[1]
+
+
+def chart_path(version, output_dir=None):
+    """Path of a built chart version, or None when that version isn't on disk"""
+    filename = chart_filename(version)
+    if not CHART_NAME.fullmatch(filename):
+        return None
+    path = os.path.join(output_dir or chart_dir(), filename)
+    return path if os.path.exists(path) else None
+
+
+def _write_atomic(path, content):
+    # Readers never see a half-written file: write alongside, then rename over
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as temp_file:
+        temp_file.write(content)
+    os.replace(temp_path, path)
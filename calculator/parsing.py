@@ -0,0 +1,261 @@
+# calculator/parsing.py
+"""Race input normalization
+
+Times may be "H:MM:SS", "MM:SS" (both with optional fractional seconds)
+or plain seconds. Distances may be named events ("5K", "Half Marathon",
+RaceResult keys like "half_marathon"), quantities in meters, km or miles
+("1500m", "10 mi", "21.1km"), or "custom" with a separate custom_distance
+as on RaceResult. Strings are matched with precompiled regexes and repeat
+values are memoized; parse_races_batch() validates a whole import in one
+call and reports per-row errors instead of raising.
+"""
+import math
+import numbers
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .predictions import STANDARD_DISTANCES
+from .services import CALCULATORS
+from .vdot_chart import MAX_VDOT, METERS_PER_MILE, MIN_VDOT
+
+DEFAULT_CALCULATOR_TYPE = 'daniels_vdot'
+
+# Plausibility bounds; anything outside is rejected as out_of_range
+MIN_DISTANCE_METERS = 100
+MAX_DISTANCE_METERS = 1_000_000
+MIN_TIME_SECONDS = 1
+MAX_TIME_SECONDS = 7 * 24 * 3600
+# Average race speed (m/s), from a slow walk to beyond the 100m world record
+MIN_VELOCITY = 0.5
+MAX_VELOCITY = 11.0
+
+_CLOCK_TIME = re.compile(
+    r'(?:(?P<hours>\d+):(?P<minutes>[0-5]?\d)|(?P<total_minutes>\d+)):(?P<seconds>[0-5]?\d(?:\.\d+)?)'
+)
+_PLAIN_SECONDS = re.compile(r'\d+(?:\.\d+)?')
+_QUANTITY = re.compile(r'(?P<value>\d+(?:\.\d*)?|\.\d+)\s*(?P<unit>[a-z]*)')
+_NAME_SEPARATORS = re.compile(r'[\s_\-]+')
+
+UNIT_METERS = {
+    '': 1,
+    'm': 1,
+    'meter': 1,
+    'meters': 1,
+    'metre': 1,
+    'metres': 1,
+    'k': 1000,
+    'km': 1000,
+    'kilometer': 1000,
+    'kilometers': 1000,
+    'kilometre': 1000,
+    'kilometres': 1000,
+    'mi': METERS_PER_MILE,
+    'mile': METERS_PER_MILE,
+    'miles': METERS_PER_MILE,
+}
+
+
+def _name_key(name):
+    """Lowercase with spaces, underscores and hyphens removed ('Half Marathon' -> 'halfmarathon')"""
+    return _NAME_SEPARATORS.sub('', name.lower())
+
+
+# Normalized event name -> meters; covers the standard distances and RaceResult.DISTANCE_CHOICES
+NAMED_DISTANCES = {
+    **{_name_key(label): float(meters) for label, meters in STANDARD_DISTANCES},
+    'half': 21097.5,
+    'fullmarathon': 42195.0,
+}
+CUSTOM_DISTANCE = 'custom'
+
+_TIME_RANGE_MESSAGE = f'Race time must be between {MIN_TIME_SECONDS} second and {MAX_TIME_SECONDS // 86400} days'
+_DISTANCE_RANGE_MESSAGE = f'Race distance must be between {MIN_DISTANCE_METERS}m and {MAX_DISTANCE_METERS // 1000:,}km'
+_VELOCITY_RANGE_MESSAGE = 'Race time is implausible for the distance'
+_VDOT_RANGE_MESSAGE = f'VDOT must be between {MIN_VDOT:g} and {MAX_VDOT:g}'
+
+
+class ParseError(ValueError):
+    """Invalid race input; `field` and `code` say which value was wrong and how"""
+
+    def __init__(self, field, code, message):
+        super().__init__(message)
+        self.field = field
+        self.code = code
+
+    def as_dict(self):
+        return {'error': str(self), 'field': self.field, 'code': self.code}
+
+
+Race = namedtuple('Race', ['time_seconds', 'distance_meters', 'calculator_type'])
+ParsedBatch = namedtuple('ParsedBatch', ['times_seconds', 'distances_meters', 'errors'])
+
+
+@lru_cache(maxsize=4096)
+def _time_string_seconds(text):
+    """Seconds for a time string, or None when it isn't one"""
+    match = _CLOCK_TIME.fullmatch(text)
+    if match is not None:
+        hours, minutes, total_minutes, seconds = match.groups()
+        if total_minutes is not None:
+            return int(total_minutes) * 60 + float(seconds)
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    if _PLAIN_SECONDS.fullmatch(text):
+        return float(text)
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _distance_string_meters(text):
+    """Meters for a named event or quantity string, or None when it is neither"""
+    key = _name_key(text)
+    if key in NAMED_DISTANCES:
+        return NAMED_DISTANCES[key]
+    match = _QUANTITY.fullmatch(text.strip().lower())
+    if match is None or match['unit'] not in UNIT_METERS:
+        return None
+    return float(match['value']) * UNIT_METERS[match['unit']]
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _in_range(value, low, high, field, message):
+    if not math.isfinite(value) or not low <= value <= high:
+        raise ParseError(field, 'out_of_range', message)
+    return value
+
+
+def parse_time(value, field='race_time'):
+    """Race time in seconds from "H:MM:SS(.ss)", "MM:SS(.ss)" or seconds"""
+    if value is None or value == '':
+        raise ParseError(field, 'required', 'Race time is required')
+    if _is_number(value):
+        seconds = float(value)
+    elif isinstance(value, str):
+        seconds = _time_string_seconds(value.strip())
+    else:
+        seconds = None
+    if seconds is None:
+        raise ParseError(field, 'invalid', 'Invalid time format')
+    return _in_range(seconds, MIN_TIME_SECONDS, MAX_TIME_SECONDS, field, _TIME_RANGE_MESSAGE)
+
+
+def parse_distance(value, custom_distance=None, field='race_distance'):
+    """Distance in meters from a named event, a quantity with units, or plain meters
+
+    "custom" reads the distance from custom_distance instead.
+    """
+    if value is None or value == '':
+        raise ParseError(field, 'required', 'Race distance is required')
+    if _is_number(value):
+        meters = float(value)
+    elif isinstance(value, str):
+        if _name_key(value) == CUSTOM_DISTANCE:
+            return parse_distance(custom_distance, field='custom_distance')
+        meters = _distance_string_meters(value)
+    else:
+        meters = None
+    if meters is None:
+        raise ParseError(field, 'invalid', 'Invalid distance')
+    return _in_range(meters, MIN_DISTANCE_METERS, MAX_DISTANCE_METERS, field, _DISTANCE_RANGE_MESSAGE)
+
+
+def check_velocity(time_seconds, distance_meters, field='race_time'):
+    """Reject a time that is implausibly fast or slow for the distance"""
+    _in_range(distance_meters / time_seconds, MIN_VELOCITY, MAX_VELOCITY, field, _VELOCITY_RANGE_MESSAGE)
+    return time_seconds
+
+
+def parse_performance(time_value, distance_value, custom_distance=None):
+    """(time_seconds, distance_meters) for a race, checked for a plausible pace"""
+    time_seconds = parse_time(time_value)
+    distance_meters = parse_distance(distance_value, custom_distance)
+    return check_velocity(time_seconds, distance_meters), distance_meters
+
+
+def parse_vdot(value, field='vdot'):
+    """A VDOT within the range of the chart"""
+    if value is None or value == '':
+        raise ParseError(field, 'required', 'VDOT is required')
+    try:
+        vdot = float(value) if _is_number(value) or isinstance(value, str) else None
+    except ValueError:
+        vdot = None
+    if vdot is None:
+        raise ParseError(field, 'invalid', 'Invalid VDOT')
+    return _in_range(vdot, MIN_VDOT, MAX_VDOT, field, _VDOT_RANGE_MESSAGE)
+
+
+def parse_calculator_type(value, field='calculator_type'):
+    """A registered calculator_type, defaulting to Daniels VDOT"""
+    if value is None or value == '':
+        return DEFAULT_CALCULATOR_TYPE
+    if not isinstance(value, str) or value not in CALCULATORS:
+        raise ParseError(field, 'invalid', 'Invalid calculator type')
+    return value
+
+
+def require_object(data):
+    """The request body as a dict; a JSON array or scalar body is invalid"""
+    if not isinstance(data, dict):
+        raise ParseError(None, 'invalid', 'Request body must be an object')
+    return data
+
+
+def parse_race(data):
+    """Parse a race payload (race_time, race_distance, custom_distance, calculator_type)"""
+    require_object(data)
+    time_seconds, distance_meters = parse_performance(
+        data.get('race_time'), data.get('race_distance'), data.get('custom_distance')
+    )
+    return Race(time_seconds, distance_meters, parse_calculator_type(data.get('calculator_type')))
+
+
+def parse_races_batch(times, distances, custom_distances=None):
+    """Parse parallel sequences of times and distances for bulk imports
+
+    Returns ParsedBatch(times_seconds, distances_meters, errors): float
+    arrays with NaN in rows that failed, and {row index: ParseError} for
+    the first problem in each such row. All-numeric columns are checked
+    with array operations instead of row by row.
+    """
+    if custom_distances is None:
+        custom_distances = [None] * len(distances)
+    errors = {}
+    times_seconds = _parse_column(
+        times, lambda i, value: parse_time(value), errors, MIN_TIME_SECONDS, MAX_TIME_SECONDS
+    )
+    distances_meters = _parse_column(
+        distances, lambda i, value: parse_distance(value, custom_distances[i]), errors,
+        MIN_DISTANCE_METERS, MAX_DISTANCE_METERS
+    )
+    with np.errstate(invalid='ignore'):
+        velocities = distances_meters / times_seconds
+        implausible = (velocities < MIN_VELOCITY) | (velocities > MAX_VELOCITY)
+    for i in np.flatnonzero(implausible).tolist():
+        errors.setdefault(i, ParseError('race_time', 'out_of_range', _VELOCITY_RANGE_MESSAGE))
+    times_seconds[implausible] = np.nan
+    distances_meters[implausible] = np.nan
+    return ParsedBatch(times_seconds, distances_meters, errors)
+
+
+def _parse_column(values, parse_one, errors, low, high):
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'iuf':
+        column = values.astype(np.float64).ravel()
+    else:
+        values = list(values)
+        column = np.asarray(values, dtype=np.float64) if all(map(_is_number, values)) else None
+    if column is not None and ((column >= low) & (column <= high)).all():
+        return column
+    # Strings (or out-of-range numbers) are checked per row; the string parsers are memoized
+    column = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            column[i] = parse_one(i, value)
+        except ParseError as e:
+            errors.setdefault(i, e)
+    return column
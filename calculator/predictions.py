@@ -0,0 +1,65 @@
+# calculator/predictions.py
+"""Equivalent race-time predictions across every standard distance"""
+import numpy as np
+
+from .formatting import format_race_time
+from .services import RiegelCalculator
+from .vdot_chart import get_vdot_chart
+
+STANDARD_DISTANCES = (
+    ('1500m', 1500),
+    ('Mile', 1609.34),
+    ('3K', 3000),
+    ('5K', 5000),
+    ('8K', 8000),
+    ('10K', 10000),
+    ('15K', 15000),
+    ('10 Mile', 16093.4),
+    ('Half Marathon', 21097.5),
+    ('Marathon', 42195),
+)
+
+PREDICTION_METHODS = ('vdot', 'riegel')
+
+
+class RacePredictor:
+    """Predict equivalent race times from a single performance"""
+
+    @staticmethod
+    def predict_times(time_seconds, distance_meters, distances_meters, method='vdot'):
+        """Predicted times (seconds) at every target distance in one vectorized call
+
+        The 'vdot' method reads equivalent performances off the Daniels
+        chart; 'riegel' applies T2 = T1 * (D2/D1)^1.06 to the whole array.
+        """
+        distances = np.asarray(distances_meters, dtype=np.float64)
+        if method == 'vdot':
+            chart = get_vdot_chart()
+            vdot = chart.vdot_for_performance(time_seconds, distance_meters)
+            return chart.times_for_vdot(vdot, distances)
+        if method == 'riegel':
+            return RiegelCalculator.predict_time(time_seconds, distance_meters, distances)
+        raise ValueError('Invalid prediction method')
+
+    @staticmethod
+    def prediction_matrix(time_seconds, distance_meters, extra_distances=(), method='vdot'):
+        """Predicted times for the standard distances plus any custom meters"""
+        labelled = list(STANDARD_DISTANCES)
+        labelled += [(f'{meters:g}m', meters) for meters in extra_distances]
+        times = RacePredictor.predict_times(
+            time_seconds, distance_meters, [meters for _, meters in labelled], method=method
+        )
+        return [
+            {
+                'distance': label,
+                'meters': meters,
+                'time_seconds': round(seconds, 1),
+                'time': format_race_time(seconds),
+            }
+            for (label, meters), seconds in zip(labelled, times.tolist())
+        ]
+
+    @staticmethod
+    def required_times(target_vdots, distances_meters):
+        """Race times needed at each distance to reach each target VDOT"""
+        return get_vdot_chart().times_for_vdot(target_vdots, distances_meters)
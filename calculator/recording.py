@@ -0,0 +1,132 @@
+# calculator/recording.py
+"""Write-behind recording of pace calculations
+
+Requests append unsaved PaceCalculation rows to an in-process buffer and
+return immediately. A daemon thread drains the buffer with bulk_create
+once it reaches BATCH_SIZE rows or every FLUSH_INTERVAL seconds, and the
+remainder is flushed when the worker process exits. Rows are checked
+against the table before they are queued, and a batch the database
+rejects is retried row by row so one bad row can't take the rest with it.
+"""
+import logging
+import math
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from runpace_pro.flushers import BackgroundFlusher
+
+logger = logging.getLogger(__name__)
+
+# Largest value an IntegerField holds on every supported database
+MAX_INTEGER = 2 ** 31 - 1
+
+
+class PaceCalculationBuffer(BackgroundFlusher):
+    """Buffer PaceCalculation rows and persist them in batches off the request path"""
+
+    thread_name = 'pace-calculation-flusher'
+
+    def __init__(self, batch_size=200, flush_interval=5.0, max_pending=10000):
+        super().__init__(flush_interval)
+        self.batch_size = batch_size
+        # Oldest rows are dropped beyond this so a database outage can't exhaust memory
+        self._pending = deque(maxlen=max_pending)
+
+    def record(self, calculation):
+        """Queue an unsaved PaceCalculation for the next flush"""
+        self._ensure_started()
+        with self._lock:
+            self._pending.append(calculation)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.wake()
+
+    def flush(self):
+        """Persist everything queued so far; returns the number of rows written"""
+        from .models import PaceCalculation
+
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+            try:
+                close_old_connections()
+                with transaction.atomic():
+                    PaceCalculation.objects.bulk_create(batch, batch_size=self.batch_size)
+            except Exception:
+                logger.warning('Bulk insert of %d pace calculation records failed, retrying row by row',
+                               len(batch), exc_info=True)
+                return self._save_each(batch)
+            return len(batch)
+
+    def _save_each(self, batch):
+        saved = 0
+        for calculation in batch:
+            try:
+                with transaction.atomic():
+                    calculation.save(force_insert=True)
+            except Exception:
+                logger.exception('Dropped pace calculation record (%s, %s)',
+                                 calculation.calculator_type, calculation.race_distance)
+            else:
+                saved += 1
+        return saved
+
+    def _discard_pending(self):
+        self._pending.clear()
+
+
+@lru_cache(maxsize=None)
+def get_calculation_buffer():
+    """Return the process-wide buffer configured in settings"""
+    options = getattr(settings, 'PACE_CALCULATION_RECORDING', {})
+    return PaceCalculationBuffer(
+        batch_size=options.get('BATCH_SIZE', 200),
+        flush_interval=options.get('FLUSH_INTERVAL', 5.0),
+        max_pending=options.get('MAX_PENDING', 10000),
+    )
+
+
+def record_calculation(calculator_type, race_distance, time_seconds, vdot, paces, pace_unit='mile'):
+    """Queue one calculation for analytics without touching the database"""
+    from .models import PaceCalculation
+
+    if not getattr(settings, 'PACE_CALCULATION_RECORDING', {}).get('ENABLED', True):
+        return
+    try:
+        time_seconds, vdot = float(time_seconds), float(vdot)
+    except (TypeError, ValueError):
+        time_seconds = vdot = math.nan
+    if not (math.isfinite(time_seconds) and math.isfinite(vdot)):
+        logger.warning('Not recording %s calculation with a non-finite time or VDOT', calculator_type)
+        return
+    calculation = PaceCalculation(
+        calculator_type=calculator_type,
+        race_distance=str(race_distance)[:PaceCalculation._meta.get_field('race_distance').max_length],
+        race_time_seconds=min(max(int(round(time_seconds)), 0), MAX_INTEGER),
+        calculated_vdot=vdot,
+        easy_pace=paces['easy'],
+        marathon_pace=paces['marathon'],
+        threshold_pace=paces['threshold'],
+        interval_pace=paces['interval'],
+        repetition_pace=paces['repetition'],
+        pace_unit=pace_unit,
+    )
+    oversized = _oversized_fields(calculation)
+    if oversized:
+        logger.warning('Not recording %s calculation; too long for %s', calculator_type, ', '.join(oversized))
+        return
+    get_calculation_buffer().record(calculation)
+
+
+def _oversized_fields(calculation):
+    """Names of text fields whose values don't fit their columns"""
+    return [
+        field.name for field in calculation._meta.concrete_fields
+        if field.max_length is not None and len(str(getattr(calculation, field.attname))) > field.max_length
+    ]
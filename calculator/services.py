@@ -1,133 +1,374 @@
-
 # calculator/services.py
+import copy
 import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from .formatting import DEFAULT_PACE_UNIT, format_pace, format_pace_batch, format_race_time_batch
+from .vdot_chart import METERS_PER_MILE, PACE_ZONES, get_vdot_chart
+
+# Races reported as equivalent times by the curve-based models
+EQUIVALENT_DISTANCES = (
+    ('5K', 5000),
+    ('10K', 10000),
+    ('Half Marathon', 21097.5),
+    ('Marathon', 42195),
+)
+EQUIVALENT_METERS = np.array([meters for _, meters in EQUIVALENT_DISTANCES], dtype=np.float64)
+
+# calculator_type -> calculator class, filled by @register_calculator
+CALCULATORS = {}
+
+def register_calculator(calculator):
+    """Class decorator adding a calculator to the registry under its key"""
+    CALCULATORS[calculator.key] = calculator
+    return calculator
+
+def get_calculator(calculator_type):
+    """Return the registered calculator class for a calculator_type"""
+    try:
+        return CALCULATORS[calculator_type]
+    except (KeyError, TypeError):
+        raise ValueError('Invalid calculator type')
+
+def _equivalent_times(predicted):
+    """Turn an (races x EQUIVALENT_DISTANCES) array of seconds into per-race {label: time} dicts"""
+    labels = [label for label, _ in EQUIVALENT_DISTANCES]
+    formatted = format_race_time_batch(predicted)
+    return [
+        dict(zip(labels, formatted[i:i + len(labels)]))
+        for i in range(0, len(formatted), len(labels))
+    ]
+
+class PaceCalculator:
+    """Interface shared by every registered pace calculator
+    
+    Subclasses set `key` and `name` and implement compute_batch() over
+    arrays of races, usually as a few array operations against coefficient
+    tables compiled at import. The scalar and batch entry points are built
+    on it, so every model handles a whole batch in one vectorized pass.
+    """
+    key = None
+    name = None
+    
+    @classmethod
+    def compute_batch(cls, times_seconds, distances_meters):
+        """Return ({zone: seconds-per-mile array}, {extra result field: list}) for 1-D race arrays"""
+        raise NotImplementedError
+    
+    @classmethod
+    def calculate_results_batch(cls, times_seconds, distances_meters, unit=DEFAULT_PACE_UNIT):
+        """Calculate result dicts for many races, with paces in `unit`, in input order"""
+        times, distances = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(times_seconds, dtype=np.float64)),
+            np.atleast_1d(np.asarray(distances_meters, dtype=np.float64)),
+        )
+        paces, extras = cls.compute_batch(times, distances)
+        paces = {zone: format_pace_batch(paces[zone], unit) for zone in PACE_ZONES}
+        return [
+            {
+                'paces': {zone: paces[zone][i] for zone in PACE_ZONES},
+                'pace_unit': unit,
+                **{field: values[i] for field, values in extras.items()},
+                'method': cls.name,
+            }
+            for i in range(len(times))
+        ]
+    
+    @classmethod
+    def calculate_result(cls, time_seconds, distance_meters, unit=DEFAULT_PACE_UNIT):
+        """Calculate the result dict for a single race"""
+        return cls.calculate_results_batch([time_seconds], [distance_meters], unit)[0]
+    
+    @classmethod
+    def get_training_paces(cls, time_seconds, distance_meters, unit=DEFAULT_PACE_UNIT):
+        """Calculate formatted training paces for a single race"""
+        return cls.calculate_result(time_seconds, distance_meters, unit)['paces']
 
-class VDOTCalculator:
-    """Daniels VDOT Calculator Implementation"""
+@register_calculator
+class VDOTCalculator(PaceCalculator):
+    """Daniels VDOT Calculator Implementation
+    
+    Backed by the compiled Daniels chart (see calculator.vdot_chart), so
+    lookups are a bisection plus linear interpolation between chart rows.
+    """
+    key = 'daniels_vdot'
+    name = 'Daniels VDOT'
     
     @staticmethod
     def calculate_vdot(time_seconds, distance_meters):
         """Calculate VDOT from race time and distance"""
-        velocity = distance_meters / time_seconds  # m/s
-        
-        # Daniels formula for VDOT
-        vdot = -4.6 + 0.182258 * velocity + 0.000104 * velocity * velocity
-        return max(30, min(85, round(vdot, 1)))
+        vdot = get_vdot_chart().vdot_for_performance(time_seconds, distance_meters)
+        return max(30, min(85, math.floor(vdot * 10 + 0.5) / 10))
     
     @staticmethod
-    def get_training_paces(vdot):
-        """Calculate training paces from VDOT"""
-        # Daniels pace calculations (simplified)
-        easy_velocity = -0.0053 * vdot + 0.1765
-        marathon_velocity = -0.0031 * vdot + 0.2040
-        threshold_velocity = -0.0039 * vdot + 0.2560
-        interval_velocity = -0.0012 * vdot + 0.2989
-        rep_velocity = 0.0010 * vdot + 0.3176
-        
-        # Convert to pace (seconds per mile)
-        easy_pace = 1609.34 / easy_velocity
-        marathon_pace = 1609.34 / marathon_velocity
-        threshold_pace = 1609.34 / threshold_velocity
-        interval_pace = 1609.34 / interval_velocity
-        rep_pace = 1609.34 / rep_velocity
-        
-        return {
-            'easy': VDOTCalculator.format_pace(easy_pace),
-            'marathon': VDOTCalculator.format_pace(marathon_pace),
-            'threshold': VDOTCalculator.format_pace(threshold_pace),
-            'interval': VDOTCalculator.format_pace(interval_pace),
-            'repetition': VDOTCalculator.format_pace(rep_pace),
-        }
+    def training_paces_for_vdot(vdot, unit=DEFAULT_PACE_UNIT):
+        """Calculate formatted training paces from a VDOT"""
+        paces = get_vdot_chart().paces_for_vdot(vdot)  # seconds per mile
+        return {zone: format_pace(paces[zone], unit) for zone in PACE_ZONES}
     
     @staticmethod
-    def format_pace(seconds_per_mile):
-        """Format pace as MM:SS"""
-        minutes = int(seconds_per_mile // 60)
-        seconds = int(seconds_per_mile % 60)
-        return f"{minutes}:{seconds:02d}"
+    def calculate_vdot_batch(times_seconds, distances_meters):
+        """Calculate VDOT for arrays of race times and distances
+        
+        Scalars broadcast, so a single distance can be scored against many times.
+        """
+        vdots = get_vdot_chart().vdot_for_performance_batch(times_seconds, distances_meters)
+        return np.clip(np.floor(vdots * 10 + 0.5) / 10, 30, 85)
+    
+    @classmethod
+    def calculate_result(cls, time_seconds, distance_meters, unit=DEFAULT_PACE_UNIT):
+        # A single bisection is cheaper than the array path
+        vdot = cls.calculate_vdot(time_seconds, distance_meters)
+        return {'paces': cls.training_paces_for_vdot(vdot, unit), 'pace_unit': unit, 'vdot': vdot, 'method': cls.name}
+    
+    @classmethod
+    def compute_batch(cls, times_seconds, distances_meters):
+        vdots = cls.calculate_vdot_batch(times_seconds, distances_meters)
+        return get_vdot_chart().paces_for_vdot_batch(vdots), {'vdot': vdots.tolist()}
 
-class McMillanCalculator:
-    """McMillan Running Calculator Implementation"""
+@register_calculator
+class McMillanCalculator(PaceCalculator):
+    """McMillan Running Calculator Implementation
     
-    @staticmethod
-    def calculate_equivalent_times(time_seconds, distance_meters):
+    Training paces scale race pace by a per-zone multiplier that depends on
+    the race's distance band; equivalent times follow McMillan's endurance
+    curve, approximated as T2 = T1 * (D2/D1)^1.07.
+    """
+    key = 'mcmillan'
+    name = 'McMillan'
+    
+    # Upper bounds (m) of the distance bands: 5K or shorter, up to 10K, longer
+    DISTANCE_BANDS = np.array([5000, 10000], dtype=np.float64)
+    # Race pace multipliers, one row per band, columns in PACE_ZONES order
+    PACE_MULTIPLIERS = np.array([
+        [1.25, 1.05, 0.95, 0.92, 0.90],
+        [1.23, 1.05, 0.97, 0.94, 0.90],
+        [1.20, 1.05, 1.00, 0.96, 0.90],
+    ])
+    FATIGUE_EXPONENT = 1.07
+    
+    @classmethod
+    def calculate_equivalent_times(cls, time_seconds, distance_meters):
         """Calculate equivalent race times using McMillan method"""
-        # McMillan pace adjustments based on race distance
-        if distance_meters <= 5000:  # 5K or shorter
-            easy_adjustment = 1.25
-            tempo_adjustment = 0.95
-            interval_adjustment = 0.92
-        elif distance_meters <= 10000:  # 10K
-            easy_adjustment = 1.23
-            tempo_adjustment = 0.97
-            interval_adjustment = 0.94
-        else:  # Half marathon or longer
-            easy_adjustment = 1.20
-            tempo_adjustment = 1.00
-            interval_adjustment = 0.96
-            
-        return {
-            'easy': McMillanCalculator.format_pace(pace_per_mile * easy_adjustment),
-            'marathon': McMillanCalculator.format_pace(pace_per_mile * 1.05),
-            'threshold': McMillanCalculator.format_pace(pace_per_mile * tempo_adjustment),
-            'interval': McMillanCalculator.format_pace(pace_per_mile * interval_adjustment),
-            'repetition': McMillanCalculator.format_pace(pace_per_mile * 0.90),
-        }
+        return cls.calculate_result(time_seconds, distance_meters)['equivalent_times']
     
-    @staticmethod
-    def format_pace(seconds_per_mile):
-        """Format pace as MM:SS"""
-        minutes = int(seconds_per_mile // 60)
-        seconds = int(seconds_per_mile % 60)
-        return f"{minutes}:{seconds:02d}"
+    @classmethod
+    def compute_batch(cls, times_seconds, distances_meters):
+        race_paces = times_seconds / distances_meters * METERS_PER_MILE
+        bands = np.searchsorted(cls.DISTANCE_BANDS, distances_meters, side='left')
+        paces = race_paces[:, None] * cls.PACE_MULTIPLIERS[bands]
+        predicted = times_seconds[:, None] * (EQUIVALENT_METERS / distances_meters[:, None]) ** cls.FATIGUE_EXPONENT
+        return (
+            {zone: paces[:, i] for i, zone in enumerate(PACE_ZONES)},
+            {'equivalent_times': _equivalent_times(predicted)},
+        )
 
-class RiegelCalculator:
+@register_calculator
+class RiegelCalculator(PaceCalculator):
     """Peter Riegel's Formula Implementation"""
+    key = 'riegel'
+    name = 'Riegel Formula'
+    
+    EXPONENT = 1.06
+    # World record 10K is approximately 1560 seconds (26:00)
+    WORLD_RECORD_10K = 1560
+    # Race pace multipliers at a fitness factor of 100, in PACE_ZONES order,
+    # and how much each grows per point of fitness factor below 100
+    BASE_MULTIPLIERS = np.array([1.20, 1.05, 0.98, 0.92, 0.88])
+    FITNESS_SLOPES = np.array([0.002, 0.001, 0.001, 0.001, 0.001])
     
     @staticmethod
     def predict_time(known_time, known_distance, target_distance):
         """Predict race time using Riegel formula: T2 = T1 * (D2/D1)^1.06"""
-        return known_time * (target_distance / known_distance) ** 1.06
+        return known_time * (target_distance / known_distance) ** RiegelCalculator.EXPONENT
     
     @staticmethod
     def calculate_fitness_factor(time_seconds, distance_meters):
         """Calculate relative fitness factor"""
+        return float(RiegelCalculator.fitness_factor_batch(time_seconds, distance_meters))
+    
+    @staticmethod
+    def fitness_factor_batch(times_seconds, distances_meters):
+        """Calculate fitness factors for arrays of races"""
         # Normalize to 10K equivalent
-        standard_distance = 10000
-        standard_time = RiegelCalculator.predict_time(time_seconds, distance_meters, standard_distance)
-        
-        # World record 10K is approximately 1560 seconds (26:00)
-        world_record_10k = 1560
-        fitness_factor = world_record_10k / standard_time * 100
-        
-        return min(100, max(30, fitness_factor))
+        standard_times = RiegelCalculator.predict_time(
+            np.asarray(times_seconds, dtype=np.float64), np.asarray(distances_meters, dtype=np.float64), 10000
+        )
+        return np.clip(RiegelCalculator.WORLD_RECORD_10K / standard_times * 100, 30, 100)
+    
+    @classmethod
+    def compute_batch(cls, times_seconds, distances_meters):
+        fitness_factors = cls.fitness_factor_batch(times_seconds, distances_meters)
+        race_paces = times_seconds / distances_meters * METERS_PER_MILE
+        multipliers = cls.BASE_MULTIPLIERS + (100 - fitness_factors)[:, None] * cls.FITNESS_SLOPES
+        paces = race_paces[:, None] * multipliers
+        return (
+            {zone: paces[:, i] for i, zone in enumerate(PACE_ZONES)},
+            {'fitness_factor': fitness_factors.tolist()},
+        )
+
+def cameron_factor(distances_meters):
+    """Cameron's f(x) = 13.49681 - 0.048865x + 2.438936/x^0.7905, x in miles"""
+    miles = np.asarray(distances_meters, dtype=np.float64) / METERS_PER_MILE
+    return 13.49681 - 0.048865 * miles + 2.438936 / miles ** 0.7905
+
+@register_calculator
+class CameronCalculator(PaceCalculator):
+    """Dave Cameron's Race Model Implementation
+    
+    Equivalent times follow T2 = T1 * (D2/D1) * f(D1)/f(D2). Each training
+    zone is paced off the model's equivalent race at a reference distance.
+    """
+    key = 'cameron'
+    name = 'Cameron Model'
+    
+    # Reference race (m) per zone in PACE_ZONES order, and the multiplier on its pace
+    ZONE_DISTANCES = np.array([42195, 42195, 15000, 5000, 1609.34])
+    ZONE_MULTIPLIERS = np.array([1.15, 1.0, 1.0, 1.0, 1.0])
+    # Race speed-factor -> zone pace, and -> equivalent time, folded into one coefficient each
+    ZONE_COEFFICIENTS = METERS_PER_MILE * ZONE_MULTIPLIERS / cameron_factor(ZONE_DISTANCES)
+    EQUIVALENT_COEFFICIENTS = EQUIVALENT_METERS / cameron_factor(EQUIVALENT_METERS)
     
     @staticmethod
-    def get_training_paces(time_seconds, distance_meters):
-        """Calculate training paces using Riegel method"""
-        fitness_factor = RiegelCalculator.calculate_fitness_factor(time_seconds, distance_meters)
-        
-        # Base pace calculations
-        base_pace = time_seconds / (distance_meters * 0.000621371)  # seconds per mile
+    def predict_time(known_time, known_distance, target_distance):
+        """Predict race time using Cameron's model"""
+        return (known_time * (target_distance / known_distance)
+                * cameron_factor(known_distance) / cameron_factor(target_distance))
+    
+    @classmethod
+    def calculate_equivalent_times(cls, time_seconds, distance_meters):
+        """Calculate equivalent race times using Cameron's model"""
+        return cls.calculate_result(time_seconds, distance_meters)['equivalent_times']
+    
+    @classmethod
+    def compute_batch(cls, times_seconds, distances_meters):
+        scaled = times_seconds * cameron_factor(distances_meters) / distances_meters
+        paces = scaled[:, None] * cls.ZONE_COEFFICIENTS
+        predicted = scaled[:, None] * cls.EQUIVALENT_COEFFICIENTS
+        return (
+            {zone: paces[:, i] for i, zone in enumerate(PACE_ZONES)},
+            {'equivalent_times': _equivalent_times(predicted)},
+        )
+
+class PaceResultCache:
+    """Bounded LRU cache with TTL for pace results
+    
+    Keys are quantized to whole meters and seconds so equivalent inputs
+    ("20:00" vs 1200.0) share an entry. When `cache_alias` is set, misses
+    fall through to that Django cache so results are shared across workers.
+    """
+    
+    def __init__(self, max_size=1024, ttl=3600, cache_alias=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(calculator_type, distance_meters, time_seconds, unit=DEFAULT_PACE_UNIT):
+        return (calculator_type, unit, int(round(distance_meters)), int(round(time_seconds)))
+    
+    def _shared_key(self, key):
+        return 'pace-result:%s:%s:%d:%d' % key
+    
+    def get(self, key):
+        """Return the cached result for a key, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
         
-        # Riegel training pace multipliers
-        easy_multiplier = 1.20 + (100 - fitness_factor) * 0.002
-        marathon_multiplier = 1.05 + (100 - fitness_factor) * 0.001
-        threshold_multiplier = 0.98 + (100 - fitness_factor) * 0.001
-        interval_multiplier = 0.92 + (100 - fitness_factor) * 0.001
-        rep_multiplier = 0.88 + (100 - fitness_factor) * 0.001
+        if self.cache_alias:
+            result = caches[self.cache_alias].get(self._shared_key(key))
+            if result is not None:
+                self._store(key, result)
+                with self._lock:
+                    self.hits += 1
+                return result
         
-        return {
-            'easy': RiegelCalculator.format_pace(base_pace * easy_multiplier),
-            'marathon': RiegelCalculator.format_pace(base_pace * marathon_multiplier),
-            'threshold': RiegelCalculator.format_pace(base_pace * threshold_multiplier),
-            'interval': RiegelCalculator.format_pace(base_pace * interval_multiplier),
-            'repetition': RiegelCalculator.format_pace(base_pace * rep_multiplier),
-        }
+        with self._lock:
+            self.misses += 1
+        return None
     
-    @staticmethod
-    def format_pace(seconds_per_mile):
-        """Format pace as MM:SS"""
-        minutes = int(seconds_per_mile // 60)
-        seconds = int(seconds_per_mile % 60)
-        return f"{minutes}:{seconds:02d}"
\ No newline at end of file
+    def set(self, key, result):
+        self._store(key, result)
+        if self.cache_alias:
+            caches[self.cache_alias].set(self._shared_key(key), result, self.ttl)
+    
+    def _store(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_compute(self, key, compute):
+        """Return a copy of the cached result, computing and storing it on a miss"""
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.set(key, result)
+        return copy.deepcopy(result)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
+
+@lru_cache(maxsize=None)
+def get_pace_result_cache():
+    """Return the process-wide pace result cache configured in settings"""
+    options = getattr(settings, 'CALCULATOR_RESULT_CACHE', {})
+    return PaceResultCache(
+        max_size=options.get('MAX_SIZE', 1024),
+        ttl=options.get('TTL', 3600),
+        cache_alias=options.get('CACHE_ALIAS'),
+    )
+
+def calculate_result(calculator_type, time_seconds, distance_meters, unit=DEFAULT_PACE_UNIT):
+    """Calculate the pace result for a single race, memoized per quantized input"""
+    calculator = get_calculator(calculator_type)
+    
+    cache = get_pace_result_cache()
+    key = cache.make_key(calculator_type, distance_meters, time_seconds, unit)
+    # Compute from the quantized inputs, so the entry is right for every input sharing its key
+    _, _, meters, seconds = key
+    return cache.get_or_compute(key, lambda: calculator.calculate_result(seconds, meters, unit))
+
+def calculate_results_batch(calculator_type, times_seconds, distances_meters, unit=DEFAULT_PACE_UNIT):
+    """Calculate pace results for many races that share one method
+    
+    Every registered calculator is vectorized, so the whole batch is one
+    pass whatever the model. Results are returned in input order. Inputs
+    are quantized like calculate_result's cache keys, so both agree.
+    """
+    times = np.rint(np.asarray(times_seconds, dtype=np.float64))
+    distances = np.rint(np.asarray(distances_meters, dtype=np.float64))
+    return get_calculator(calculator_type).calculate_results_batch(times, distances, unit)
@@ -0,0 +1,393 @@
+# calculator/tests.py
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from . import pace_chart
+from .parsing import ParseError, parse_distance, parse_race, parse_races_batch, parse_time
+from .models import PaceCalculation
+from .recording import MAX_INTEGER, PaceCalculationBuffer, get_calculation_buffer, record_calculation
+from .services import (
+    CALCULATORS, PaceResultCache, VDOTCalculator, calculate_result, calculate_results_batch,
+    get_pace_result_cache,
+)
+from .vdot_chart import METERS_PER_MILE, _fill_gaps, _reject_outliers, daniels_vdot, parse_chart_cell
+
+
+class ParsingBoundsTests(SimpleTestCase):
+    """Implausible times, distances and paces are rejected as out_of_range"""
+
+    def assertOutOfRange(self, parse, *args):
+        with self.assertRaises(ParseError) as raised:
+            parse(*args)
+        self.assertEqual(raised.exception.code, 'out_of_range')
+        return raised.exception
+
+    def test_time_bounds(self):
+        self.assertEqual(parse_time('20:00'), 1200)
+        for value in (1e300, 0, -5, float('nan'), float('inf'), '999999:00:00'):
+            self.assertOutOfRange(parse_time, value)
+
+    def test_distance_bounds(self):
+        self.assertEqual(parse_distance('5K'), 5000)
+        for value in (1e-300, '1 m', 99, 1e7, float('nan'), '2000 km'):
+            self.assertOutOfRange(parse_distance, value)
+        self.assertOutOfRange(parse_distance, 'custom', 50)
+
+    def test_velocity_bounds(self):
+        self.assertEqual(parse_race({'race_time': '3:50', 'race_distance': 'mile'}).time_seconds, 230)
+        error = self.assertOutOfRange(parse_race, {'race_time': 30, 'race_distance': '5K'})
+        self.assertEqual(error.field, 'race_time')
+        self.assertOutOfRange(parse_race, {'race_time': '100:00:00', 'race_distance': '5K'})
+
+    def test_batch_matches_scalar_bounds(self):
+        parsed = parse_races_batch([1200, 1e300, 30, 1200], [5000, 5000, 5000, 1e-300])
+        self.assertEqual(sorted(parsed.errors), [1, 2, 3])
+        self.assertTrue(all(error.code == 'out_of_range' for error in parsed.errors.values()))
+        self.assertEqual((parsed.times_seconds[0], parsed.distances_meters[0]), (1200, 5000))
+        self.assertTrue(np.isnan(parsed.times_seconds[1:3]).all())
+        self.assertTrue(np.isnan(parsed.distances_meters[3]))
+
+
+class ChartCellTests(SimpleTestCase):
+    """Cells from the chart CSV are normalized to seconds, or dropped"""
+
+    def test_cells_resolve_to_the_plausible_reading(self):
+        # MM:SS typed as H:MM:SS, with and without the row's VDOT
+        self.assertEqual(parse_chart_cell('30:40:00', 10000, daniels_vdot(1840, 10000)), 1840)
+        self.assertEqual(parse_chart_cell('30:40:00', 10000), 1840)
+        self.assertEqual(parse_chart_cell('98', 400), 98)
+        self.assertEqual(parse_chart_cell('6:4O', METERS_PER_MILE), 400)
+        # Dropped colon: 26:19 fits a VDOT 36 5K, 2619 seconds doesn't
+        self.assertEqual(parse_chart_cell('2619', 5000, 36), 1579)
+        self.assertIsNone(parse_chart_cell('2619', 5000, 60))
+
+    def test_unusable_cells_are_dropped(self):
+        for cell in ("8'7", '', '12::30', 'n/a'):
+            self.assertIsNone(parse_chart_cell(cell, METERS_PER_MILE), cell)
+
+    def test_outliers_are_replaced_from_their_neighbours(self):
+        vdots = [50, 51, 52, 53, 54]
+        values = _reject_outliers([400, 390, 413, 370, 360])
+        self.assertEqual(values, [400, 390, None, 370, 360])
+        self.assertEqual(_fill_gaps(vdots, values, 'threshold').tolist(), [400, 390, 380, 370, 360])
+        with self.assertRaises(ImproperlyConfigured):
+            _fill_gaps(vdots, [400, None, None, None, None], 'threshold')
+        with self.assertRaises(ImproperlyConfigured):
+            _fill_gaps(vdots, [400, 410, 380, 370, 360], 'threshold')
+
+
+class CalculatePacesInputTests(APITestCase):
+
+    def tearDown(self):
+        # Write queued calculations while the test database still exists
+        get_calculation_buffer().flush()
+
+    def test_out_of_range_input_is_a_bad_request(self):
+        for payload in (
+            {'race_time': 1e300, 'race_distance': '5K'},
+            {'race_time': '20:00', 'race_distance': 1e-300},
+            {'race_time': '20:00', 'race_distance': '1 m'},
+            {'race_time': '20:00', 'race_distance': 1e-300, 'calculator_type': 'cameron'},
+        ):
+            response = self.client.post('/api/calculator/calculate/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertEqual(response.data['code'], 'out_of_range')
+
+    def test_non_object_body_is_a_bad_request(self):
+        for body in ([1], ['20:00', '5K'], 'race', 5):
+            response = self.client.post('/api/calculator/calculate/', body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(response.data, {'error': 'Request body must be an object', 'field': None,
+                                             'code': 'invalid'})
+
+    def test_batch_reports_out_of_range_rows(self):
+        response = self.client.post('/api/calculator/calculate-batch/', {'races': [
+            {'race_time': '20:00', 'race_distance': '5K'},
+            {'race_time': '20:00', 'race_distance': 1e-300, 'calculator_type': 'cameron'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('paces', response.data['results'][0])
+        self.assertEqual(response.data['results'][1]['code'], 'out_of_range')
+
+
+class PredictionInputTests(APITestCase):
+
+    def test_extra_distances_are_parsed_and_bounded(self):
+        response = self.client.post('/api/calculator/predict/', {
+            'race_time': '20:00', 'race_distance': '5K', 'distances': ['15K', 800],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['meters'] for row in response.data['predictions'][-2:]], [15000, 800])
+        for method, distances in (('vdot', ['nan']), ('riegel', [1e300]), ('vdot', [50]), ('vdot', '5000')):
+            response = self.client.post('/api/calculator/predict/', {
+                'race_time': '20:00', 'race_distance': '5K', 'method': method, 'distances': distances,
+            }, format='json')
+            self.assertEqual(response.status_code, 400, distances)
+            self.assertEqual(response.data['field'], 'distances')
+
+    def test_non_object_body_is_a_bad_request(self):
+        response = self.client.post('/api/calculator/predict/', [1], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.data['field'], response.data['code']), (None, 'invalid'))
+
+    def test_target_vdot_must_be_finite_and_on_the_chart(self):
+        response = self.client.get('/api/calculator/required-time/', {'target_vdot': '50', 'race_distance': '5K'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['required_times'][0]['meters'], 5000)
+        for target_vdot in ('nan', 'inf', '29.9', '90', 'fast', ''):
+            response = self.client.get('/api/calculator/required-time/', {'target_vdot': target_vdot})
+            self.assertEqual(response.status_code, 400, target_vdot)
+            self.assertEqual(response.data['field'], 'target_vdot')
+
+
+class ConditionAdjustedPacesTests(APITestCase):
+
+    def test_vdot_must_be_finite_and_on_the_chart(self):
+        response = self.client.post('/api/calculator/adjust-paces/', {'vdot': 50, 'temperature': 80}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.data['time_factor'], 1)
+        for vdot in ('nan', 'inf', '-inf', 29, 86, None, ['50']):
+            response = self.client.post('/api/calculator/adjust-paces/', {'vdot': vdot}, format='json')
+            self.assertEqual(response.status_code, 400, vdot)
+            self.assertEqual(response.data['field'], 'vdot')
+
+    def test_non_object_body_is_a_bad_request(self):
+        response = self.client.post('/api/calculator/adjust-paces/', [1], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.data['field'], response.data['code']), (None, 'invalid'))
+
+
+class PaceUnitTests(APITestCase):
+
+    def tearDown(self):
+        get_calculation_buffer().flush()
+
+    def test_pace_unit(self):
+        response = self.client.post('/api/calculator/calculate/', {
+            'race_time': '20:00', 'race_distance': '5K', 'pace_unit': 'km',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pace_unit'], 'km')
+
+    def test_unhashable_pace_unit_is_a_bad_request(self):
+        for unit in (['km'], {'unit': 'km'}, 'furlong'):
+            response = self.client.post('/api/calculator/calculate/', {
+                'race_time': '20:00', 'race_distance': '5K', 'pace_unit': unit,
+            }, format='json')
+            self.assertEqual(response.status_code, 400, unit)
+            self.assertEqual(response.data['error'], 'Invalid pace unit')
+            response = self.client.post('/api/calculator/calculate-batch/', {
+                'races': [], 'pace_unit': unit,
+            }, format='json')
+            self.assertEqual(response.status_code, 400, unit)
+
+
+class CalculatorRegistryTests(SimpleTestCase):
+
+    def test_training_paces_share_the_base_signature(self):
+        for calculator_type, calculator in CALCULATORS.items():
+            paces = calculator.get_training_paces(1200, 5000, 'km')
+            self.assertEqual(paces, calculator.calculate_result(1200, 5000, 'km')['paces'], calculator_type)
+
+    def test_training_paces_for_vdot(self):
+        vdot = VDOTCalculator.calculate_vdot(1200, 5000)
+        self.assertEqual(VDOTCalculator.training_paces_for_vdot(vdot), VDOTCalculator.get_training_paces(1200, 5000))
+
+    def test_scalar_and_batch_results_match(self):
+        times, distances = [1200, 2700, 5400], [5000, 10000, 21097.5]
+        for calculator_type in CALCULATORS:
+            batch = calculate_results_batch(calculator_type, times, distances, 'mile')
+            for time_seconds, distance_meters, result in zip(times, distances, batch):
+                self.assertEqual(calculate_result(calculator_type, time_seconds, distance_meters, 'mile'), result)
+
+
+class PaceResultCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = PaceResultCache(max_size=2, ttl=60)
+
+    def test_counts_hits_misses_and_evictions(self):
+        self.assertIsNone(self.cache.get('a'))
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, {'key': key})
+        self.assertEqual(self.cache.get('c'), {'key': 'c'})
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 1, 'size': 2, 'max_size': 2})
+
+    def test_evicts_the_least_recently_used(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertEqual((self.cache.get('a'), self.cache.get('b'), self.cache.get('c')), (1, None, 3))
+
+    def test_entries_expire_after_the_ttl(self):
+        with mock.patch('calculator.services.time.monotonic', return_value=1000):
+            self.cache.set('a', 1)
+        with mock.patch('calculator.services.time.monotonic', return_value=1059):
+            self.assertEqual(self.cache.get('a'), 1)
+        with mock.patch('calculator.services.time.monotonic', return_value=1061):
+            self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_misses_fall_through_to_the_shared_cache(self):
+        key = PaceResultCache.make_key('daniels_vdot', 5000, 1200)
+        writer = PaceResultCache(cache_alias='default')
+        reader = PaceResultCache(cache_alias='default')
+        self.addCleanup(caches['default'].delete, writer._shared_key(key))
+        writer.set(key, {'vdot': 49.8})
+        self.assertEqual(reader.get(key), {'vdot': 49.8})
+        self.assertEqual(reader.stats()['size'], 1)
+
+    def test_results_are_computed_from_the_quantized_inputs(self):
+        self.addCleanup(get_pace_result_cache().clear)
+        get_pace_result_cache().clear()
+        fractional = calculate_result('riegel', 1199.6, 5000.4)
+        self.assertEqual(fractional, calculate_result('riegel', 1200.4, 4999.6))
+        self.assertEqual(fractional, calculate_results_batch('riegel', [1200.4], [4999.6])[0])
+        get_pace_result_cache().clear()
+        self.assertEqual(calculate_result('riegel', 1200, 5000), fractional)
+
+
+class RecordingTests(TestCase):
+    PACES = {'easy': '8:30', 'marathon': '7:45', 'threshold': '7:00', 'interval': '1:38', 'repetition': '1:32'}
+
+    def setUp(self):
+        # Never woken by size or timer, so rows are only written by the explicit flushes below
+        self.buffer = PaceCalculationBuffer(batch_size=1000, flush_interval=3600)
+        self.addCleanup(self.buffer.stop)
+        patcher = mock.patch('calculator.recording.get_calculation_buffer', return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, **overrides):
+        values = {'calculator_type': 'daniels_vdot', 'race_distance': '5K', 'time_seconds': 1200,
+                  'vdot': 49.8, 'paces': self.PACES}
+        values.update(overrides)
+        record_calculation(**values)
+
+    def test_rows_are_checked_before_queueing(self):
+        with self.assertLogs('calculator.recording', 'WARNING') as logs:
+            self.record(vdot=float('nan'))
+            self.record(time_seconds=float('inf'))
+            self.record(vdot=None)
+            self.record(paces={**self.PACES, 'easy': '12345:00:00'})
+        self.assertEqual(len(logs.records), 4)
+        self.record(time_seconds=1e300)
+        self.record(race_distance='x' * 50)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(
+            sorted(PaceCalculation.objects.values_list('race_time_seconds', flat=True)), [1200, MAX_INTEGER]
+        )
+        self.assertTrue(PaceCalculation.objects.filter(race_distance='x' * 20).exists())
+
+    def test_bad_row_does_not_drop_the_batch(self):
+        for _ in range(3):
+            self.record()
+        # Slips past record_calculation's checks, fails NOT NULL on insert
+        self.buffer.record(PaceCalculation(
+            calculator_type='daniels_vdot', race_distance='5K', race_time_seconds=1200, calculated_vdot=None,
+            **{f'{zone}_pace': pace for zone, pace in self.PACES.items()},
+        ))
+        self.record()
+        with self.assertLogs('calculator.recording', 'WARNING'):
+            self.assertEqual(self.buffer.flush(), 4)
+        self.assertEqual(PaceCalculation.objects.count(), 4)
+
+
+class PaceChartTests(SimpleTestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.output_dir = temp_dir.name
+        settings_override = override_settings(PACE_CHART={'OUTPUT_DIR': self.output_dir})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_version_follows_the_content(self):
+        version, content = pace_chart.render_pace_chart()
+        self.assertEqual(pace_chart.render_pace_chart(), (version, content))
+        chart = json.loads(content)
+        chart['paces']['mile']['easy'][0] += 1
+        with mock.patch.object(pace_chart, 'build_pace_chart', return_value=chart):
+            self.assertNotEqual(pace_chart.render_pace_chart()[0], version)
+
+    def test_manifest_points_at_the_written_chart(self):
+        manifest = pace_chart.write_pace_chart()
+        self.assertEqual(pace_chart.load_manifest(), manifest)
+        path = pace_chart.chart_path(manifest['version'])
+        self.assertEqual(os.path.basename(path), manifest['file'])
+        self.assertEqual(os.path.getsize(path), manifest['size'])
+        with open(path, 'rb') as chart_file:
+            self.assertEqual(chart_file.read(), pace_chart.render_pace_chart()[1])
+
+    def test_chart_is_immutable_and_revalidates(self):
+        self.assertEqual(self.client.get('/api/calculator/pace-chart/').status_code, 404)
+        manifest = pace_chart.write_pace_chart()
+        url = self.client.get('/api/calculator/pace-chart/').data['url']
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        etag = f'"{manifest["version"]}"'
+        self.assertEqual(response['ETag'], etag)
+        response.close()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/api/calculator/pace-chart/0123456789abcdef.json').status_code, 404)
+
+    def test_prune_keeps_the_current_chart(self):
+        old_chart = os.path.join(self.output_dir, pace_chart.chart_filename('0123456789abcdef'))
+        open(old_chart, 'wb').close()
+        out = StringIO()
+        call_command('build_pace_chart', prune=True, stdout=out)
+        manifest = pace_chart.load_manifest()
+        self.assertEqual(sorted(os.listdir(self.output_dir)), sorted([manifest['file'], pace_chart.MANIFEST_NAME]))
+        self.assertIn('Removed pace-chart.0123456789abcdef.json', out.getvalue())
+
+
+class RecordedCalculationTests(APITestCase):
+    """Calculations are recorded with the inputs their results came from"""
+
+    def setUp(self):
+        get_pace_result_cache().clear()
+        self.addCleanup(get_pace_result_cache().clear)
+        self.buffer = PaceCalculationBuffer(batch_size=1000, flush_interval=3600)
+        self.addCleanup(self.buffer.stop)
+        patcher = mock.patch('calculator.recording.get_calculation_buffer', return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def recorded(self):
+        self.buffer.flush()
+        return list(PaceCalculation.objects.order_by('pk').values_list('race_time_seconds', 'calculated_vdot'))
+
+    def test_condition_normalized_time_is_recorded(self):
+        response = self.client.post('/api/calculator/calculate/', {
+            'race_time': '50:00', 'race_distance': '10K', 'temperature': 85, 'humidity': 80,
+        }, format='json')
+        normalized = response.data['conditions']['normalized_time_seconds']
+        self.assertLess(normalized, 3000)
+        self.assertEqual(self.recorded(), [(round(normalized), response.data['vdot'])])
+
+    def test_batch_vdots_are_scored_once_per_method(self):
+        races = [{'race_time': time, 'race_distance': '5K', 'calculator_type': 'riegel'}
+                 for time in ('18:00', '20:00', '22:00')]
+        with mock.patch.object(VDOTCalculator, 'calculate_vdot', side_effect=AssertionError), \
+                mock.patch.object(VDOTCalculator, 'calculate_vdot_batch',
+                                  wraps=VDOTCalculator.calculate_vdot_batch) as calculate_vdot_batch:
+            response = self.client.post('/api/calculator/calculate-batch/', {'races': races}, format='json')
+        self.assertEqual(response.status_code, 200)
+        calculate_vdot_batch.assert_called_once()
+        self.assertEqual(self.recorded(), [
+            (seconds, VDOTCalculator.calculate_vdot(seconds, 5000)) for seconds in (1080, 1200, 1320)
+        ])
@@ -5,4 +5,10 @@ from . import views
 
 urlpatterns = [
     path('calculate/', views.calculate_paces, name='calculate_paces'),
+    path('calculate-batch/', views.calculate_paces_batch, name='calculate_paces_batch'),
+    path('predict/', views.predict_race_times, name='predict_race_times'),
+    path('required-time/', views.required_race_times, name='required_race_times'),
+    path('adjust-paces/', views.condition_adjusted_paces, name='condition_adjusted_paces'),
+    path('pace-chart/', views.pace_chart_version, name='pace_chart_version'),
+    path('pace-chart/<slug:version>.json', views.pace_chart, name='pace_chart'),
 ]
\ No newline at end of file
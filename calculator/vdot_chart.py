@@ -0,0 +1,298 @@
+# calculator/vdot_chart.py
+"""Compiled Daniels VDOT chart
+
+The chart CSV (VDOT 30-85 with equivalent race times and training paces) is
+parsed once into sorted columns. Lookups bisect the VDOT or time column and
+linearly interpolate between rows, with vectorized equivalents for batches.
+"""
+import bisect
+import csv
+import math
+import re
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+METERS_PER_MILE = 1609.34
+
+# Race columns in the chart: (name, meters)
+RACE_COLUMNS = (
+    ('mile', 1609.34),
+    ('5k', 5000),
+    ('10k', 10000),
+    ('half_marathon', 21097.5),
+    ('marathon', 42195),
+)
+CSV_COLUMNS = ('5k', 'mile', '10k', 'half_marathon', 'marathon',
+               'easy', 'threshold', 'interval', 'repetition')
+PACE_COLUMN_METERS = {
+    'easy': METERS_PER_MILE,
+    'threshold': METERS_PER_MILE,
+    'interval': 400,
+    'repetition': 400,
+}
+PACE_ZONES = ('easy', 'marathon', 'threshold', 'interval', 'repetition')
+
+# Any plausible chart entry runs between these speeds (m/s)
+MIN_VELOCITY = 2.0
+MAX_VELOCITY = 8.0
+# VDOT range the chart covers
+MIN_VDOT = 30.0
+MAX_VDOT = 85.0
+# A race cell is accepted when its Daniels-Gilbert VDOT is within this of the row's VDOT
+VDOT_TOLERANCE = 3.0
+
+_OCR_FIXES = str.maketrans({'l': '1', 'I': '1', 'O': '0', 'o': '0'})
+_NON_TIME_CHARS = re.compile(r'[^0-9:]')
+
+
+def _cell_candidates(cell):
+    """Return every duration (seconds) a chart cell could plausibly mean"""
+    cleaned = _NON_TIME_CHARS.sub('', cell.strip().translate(_OCR_FIXES))
+    if not cleaned:
+        return []
+
+    parts = cleaned.split(':')
+    if any(not part for part in parts):
+        return []
+    numbers = [int(part) for part in parts]
+
+    if len(numbers) == 3:
+        hours, minutes, seconds = numbers
+        candidates = [hours * 3600 + minutes * 60 + seconds]
+        if seconds == 0:
+            # Spreadsheet artifact: "30:40:00" was typed as MM:SS
+            candidates.append(hours * 60 + minutes)
+        return candidates
+
+    if len(numbers) == 2:
+        first, second = numbers
+        # MM:SS or H:MM
+        return [first * 60 + second, first * 3600 + second * 60]
+
+    if len(numbers) == 1:
+        digits = parts[0]
+        candidates = [numbers[0]]  # plain seconds
+        if len(digits) in (3, 4):
+            # Colon dropped: "221" -> 2:21, "6346" -> 63:46, read as H:MM or MM:SS
+            head, tail = int(digits[:-2]), int(digits[-2:])
+            candidates += [head * 60 + tail, head * 3600 + tail * 60]
+        elif len(digits) == 5:
+            # "13638" -> 1:36:38
+            candidates.append(int(digits[0]) * 3600 + int(digits[1:3]) * 60 + int(digits[3:]))
+        return candidates
+
+    return []
+
+
+def daniels_vdot(time_seconds, distance_meters):
+    """Daniels-Gilbert VDOT for a race, used to sanity-check chart cells"""
+    minutes = time_seconds / 60
+    velocity = distance_meters / minutes  # m/min
+    vo2 = -4.60 + 0.182258 * velocity + 0.000104 * velocity * velocity
+    percent_max = (0.8 + 0.1894393 * math.exp(-0.012778 * minutes)
+                   + 0.2989558 * math.exp(-0.1932605 * minutes))
+    return vo2 / percent_max
+
+
+def parse_chart_cell(cell, meters, vdot=None):
+    """Normalize a chart cell covering `meters` to seconds, or None if unusable
+
+    Race cells pass the row's VDOT so ambiguous readings such as "2619"
+    (2619 seconds or 26:19) resolve to the one consistent with that VDOT.
+    """
+    plausible = {
+        seconds for seconds in _cell_candidates(cell)
+        if seconds > 0 and MIN_VELOCITY <= meters / seconds <= MAX_VELOCITY
+    }
+    if vdot is not None:
+        scored = sorted((abs(daniels_vdot(seconds, meters) - vdot), seconds) for seconds in plausible)
+        if scored and scored[0][0] <= VDOT_TOLERANCE:
+            return scored[0][1]
+        return None
+    if len(plausible) != 1:
+        return None
+    return plausible.pop()
+
+
+def _reject_outliers(values):
+    """Blank out cells that break the column's monotonic decrease
+
+    A cell is rejected when its neighbours agree with each other but not
+    with it, e.g. a threshold pace of 6:53 between 6:40 and 6:30.
+    """
+    values = list(values)
+    for i in range(1, len(values) - 1):
+        before, current, after = values[i - 1], values[i], values[i + 1]
+        if None in (before, current, after):
+            continue
+        if before >= after and not before >= current >= after:
+            values[i] = None
+    return values
+
+
+def _fill_gaps(vdots, values, name):
+    """Interpolate rejected cells from their neighbours"""
+    known = [(vdot, value) for vdot, value in zip(vdots, values) if value is not None]
+    if len(known) < 2:
+        raise ImproperlyConfigured(f"VDOT chart column '{name}' has too few valid cells")
+    known_vdots, known_values = zip(*known)
+    filled = np.interp(vdots, known_vdots, known_values)
+    if np.any(np.diff(filled) > 0):
+        raise ImproperlyConfigured(f"VDOT chart column '{name}' is not monotonic")
+    return filled
+
+
+class VDOTChart:
+    """In-memory VDOT lookup table with bisection and linear interpolation"""
+
+    def __init__(self, vdots, race_times, paces):
+        self.vdots = np.asarray(vdots, dtype=np.float64)
+        self._vdot_list = self.vdots.tolist()
+        # Race times in seconds keyed by distance in meters
+        self.race_times = {meters: np.asarray(times, dtype=np.float64)
+                           for meters, times in race_times.items()}
+        self._race_distances = sorted(self.race_times)
+        self._log_distances = [math.log(meters) for meters in self._race_distances]
+        # Training paces in seconds per mile keyed by zone
+        self.paces = {zone: np.asarray(paces[zone], dtype=np.float64) for zone in PACE_ZONES}
+        self._pace_lists = {zone: values.tolist() for zone, values in self.paces.items()}
+        self._columns_for_distance = lru_cache(maxsize=128)(self._build_distance_column)
+        self._time_matrices = lru_cache(maxsize=32)(self._build_time_matrix)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Build the chart from the Daniels chart CSV, normalizing malformed cells"""
+        rows = []
+        with open(path, newline='', encoding='utf-8') as chart_file:
+            for record in csv.reader(chart_file):
+                try:
+                    vdot = float(record[0])
+                except (ValueError, IndexError):
+                    continue  # header and spacer rows
+                rows.append((vdot, dict(zip(CSV_COLUMNS, record[1:]))))
+        if len(rows) < 2:
+            raise ImproperlyConfigured(f'VDOT chart {path} has no data rows')
+        rows.sort(key=lambda row: row[0])
+
+        vdots = [vdot for vdot, _ in rows]
+        columns = {}
+        for name, meters in RACE_COLUMNS:
+            parsed = [parse_chart_cell(cells.get(name, ''), meters, vdot) for vdot, cells in rows]
+            columns[name] = _fill_gaps(vdots, _reject_outliers(parsed), name)
+        for name, meters in PACE_COLUMN_METERS.items():
+            parsed = [parse_chart_cell(cells.get(name, ''), meters) for _, cells in rows]
+            columns[name] = _fill_gaps(vdots, _reject_outliers(parsed), name)
+
+        race_times = {meters: columns[name] for name, meters in RACE_COLUMNS}
+        paces = {
+            zone: columns[zone] * (METERS_PER_MILE / PACE_COLUMN_METERS[zone])
+            for zone in PACE_COLUMN_METERS
+        }
+        # The chart lists marathon race times rather than a marathon pace column
+        paces['marathon'] = columns['marathon'] * (METERS_PER_MILE / 42195)
+        return cls(vdots, race_times, paces)
+
+    @property
+    def min_vdot(self):
+        return self._vdot_list[0]
+
+    @property
+    def max_vdot(self):
+        return self._vdot_list[-1]
+
+    def _build_distance_column(self, distance_meters):
+        """Equivalent times for every chart VDOT at an arbitrary distance
+
+        Returned as ascending time arrays/lists (i.e. descending VDOT) ready
+        for bisection. Distances between chart columns interpolate in
+        log-time/log-distance space; distances outside extrapolate from the
+        nearest two columns.
+        """
+        if distance_meters in self.race_times:
+            times = self.race_times[distance_meters]
+        else:
+            log_distance = math.log(distance_meters)
+            upper = bisect.bisect_left(self._log_distances, log_distance)
+            upper = min(max(upper, 1), len(self._race_distances) - 1)
+            lower = upper - 1
+            log_lower = np.log(self.race_times[self._race_distances[lower]])
+            log_upper = np.log(self.race_times[self._race_distances[upper]])
+            fraction = ((log_distance - self._log_distances[lower])
+                        / (self._log_distances[upper] - self._log_distances[lower]))
+            times = np.exp(log_lower + (log_upper - log_lower) * fraction)
+        ascending_times = times[::-1].copy()
+        return ascending_times, ascending_times.tolist(), self.vdots[::-1].tolist()
+
+    def vdot_for_performance(self, time_seconds, distance_meters):
+        """VDOT for a race performance, clamped to the chart range"""
+        _, times, vdots = self._columns_for_distance(float(distance_meters))
+        index = bisect.bisect_left(times, time_seconds)
+        if index == 0:
+            return vdots[0]
+        if index == len(times):
+            return vdots[-1]
+        t0, t1 = times[index - 1], times[index]
+        v0, v1 = vdots[index - 1], vdots[index]
+        # Same operation order as np.interp so scalar and batch results agree bit for bit
+        return (v1 - v0) / (t1 - t0) * (time_seconds - t0) + v0
+
+    def vdot_for_performance_batch(self, times_seconds, distances_meters):
+        """Vectorized vdot_for_performance over arrays of times and distances"""
+        times, distances = np.broadcast_arrays(
+            np.asarray(times_seconds, dtype=np.float64),
+            np.asarray(distances_meters, dtype=np.float64),
+        )
+        vdots = np.empty(times.shape, dtype=np.float64)
+        unique_distances, inverse = np.unique(distances, return_inverse=True)
+        inverse = inverse.reshape(times.shape)
+        descending_vdots = self.vdots[::-1]
+        for i, distance in enumerate(unique_distances.tolist()):
+            ascending_times = self._columns_for_distance(distance)[0]
+            mask = inverse == i
+            vdots[mask] = np.interp(times[mask], ascending_times, descending_vdots)
+        return vdots
+
+    def _build_time_matrix(self, distances_meters):
+        """Chart times (rows: ascending VDOT, columns: distances) for a distance tuple"""
+        return np.column_stack([
+            self._columns_for_distance(distance)[0][::-1] for distance in distances_meters
+        ])
+
+    def times_for_vdot(self, vdots, distances_meters):
+        """Equivalent race times (seconds) for one or more VDOTs at many distances
+
+        Returns an array shaped vdots.shape + (len(distances_meters),); a
+        single VDOT gives one row of times. VDOTs are clamped to the chart.
+        """
+        distances = tuple(float(distance) for distance in np.atleast_1d(distances_meters).tolist())
+        matrix = self._time_matrices(distances)
+        vdots = np.clip(np.asarray(vdots, dtype=np.float64), self.min_vdot, self.max_vdot)
+        upper = np.clip(np.searchsorted(self.vdots, vdots, side='right'), 1, len(self.vdots) - 1)
+        lower = upper - 1
+        fraction = (vdots - self.vdots[lower]) / (self.vdots[upper] - self.vdots[lower])
+        return matrix[lower] + (matrix[upper] - matrix[lower]) * fraction[..., np.newaxis]
+
+    def paces_for_vdot(self, vdot):
+        """Training paces (seconds per mile) for a VDOT, clamped to the chart range"""
+        vdots = self._vdot_list
+        vdot = min(max(vdot, vdots[0]), vdots[-1])
+        index = min(max(bisect.bisect_right(vdots, vdot), 1), len(vdots) - 1)
+        v0, v1 = vdots[index - 1], vdots[index]
+        return {
+            zone: (values[index] - values[index - 1]) / (v1 - v0) * (vdot - v0) + values[index - 1]
+            for zone, values in self._pace_lists.items()
+        }
+
+    def paces_for_vdot_batch(self, vdots):
+        """Vectorized paces_for_vdot; returns arrays of seconds per mile by zone"""
+        vdots = np.asarray(vdots, dtype=np.float64)
+        return {zone: np.interp(vdots, self.vdots, values) for zone, values in self.paces.items()}
+
+
+@lru_cache(maxsize=None)
+def get_vdot_chart():
+    """Return the process-wide chart, loading it on first use"""
+    return VDOTChart.from_csv(settings.VDOT_CHART_PATH)
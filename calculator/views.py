@@ -1,62 +1,301 @@
-
 # calculator/views.py
+import numpy as np
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from .services import VDOTCalculator, McMillanCalculator, RiegelCalculator
+from .environment import adjusted_training_paces, get_conditions_grid, gain_per_mile
+from .formatting import format_pace, format_race_time, resolve_pace_unit
+from .pace_chart import chart_path, load_manifest
+from .parsing import (
+    ParseError, parse_calculator_type, parse_distance, parse_performance, parse_race, parse_races_batch,
+    parse_vdot, require_object,
+)
+from .predictions import PREDICTION_METHODS, RacePredictor, STANDARD_DISTANCES
+from .recording import record_calculation
+from .services import VDOTCalculator, calculate_result, calculate_results_batch
 from .serializers import PaceCalculationSerializer
 
+MAX_BATCH_SIZE = 500
+# Seconds clients may reuse the pace chart version and a built chart
+PACE_CHART_VERSION_MAX_AGE = 60
+PACE_CHART_MAX_AGE = 365 * 24 * 3600
+
+def _parse_condition(data, name, low, high):
+    """Parse an optional numeric condition; None when missing, ValueError when malformed"""
+    value = data.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid {name}')
+    if not low <= value <= high:
+        raise ValueError(f'Invalid {name}')
+    return value
+
+def _parse_conditions(data):
+    """Parse optional race conditions into (temperature F, humidity %, elevation gain ft)"""
+    return (
+        _parse_condition(data, 'temperature', -40, 130),
+        _parse_condition(data, 'humidity', 0, 100),
+        _parse_condition(data, 'elevation_gain', 0, 50000),
+    )
+
+def _pace_unit(request, data):
+    """The requested pace_unit, defaulting to the user's preferred units"""
+    return resolve_pace_unit(data.get('pace_unit'), request.user)
+
+def _record(calculator_type, race_distances, times_seconds, distances_meters, results):
+    """Queue successful calculations for analytics (write-behind, never blocks)
+
+    Times are the ones the results were computed from. Results without a
+    VDOT of their own are scored in one vectorized pass, on the same whole
+    seconds and meters the calculators used.
+    """
+    ok = [i for i, result in enumerate(results) if 'error' not in result]
+    missing = [i for i in ok if results[i].get('vdot') is None]
+    vdots = {}
+    if missing:
+        scored = VDOTCalculator.calculate_vdot_batch(
+            np.rint([times_seconds[i] for i in missing]), np.rint([distances_meters[i] for i in missing])
+        )
+        vdots = dict(zip(missing, scored.tolist()))
+    for i in ok:
+        result = results[i]
+        record_calculation(calculator_type, race_distances[i], times_seconds[i], vdots.get(i, result.get('vdot')),
+                           result['paces'], result['pace_unit'])
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def calculate_paces(request):
-    """Calculate training paces using different methods"""
-    data = request.data
-    
-    # Parse input
-    race_time = data.get('race_time')  # "MM:SS" or "HH:MM:SS"
-    race_distance = data.get('race_distance')  # "5K", "10K", etc.
-    calculator_type = data.get('calculator_type', 'daniels_vdot')
-    
-    # Convert time to seconds
-    time_parts = race_time.split(':')
-    if len(time_parts) == 2:
-        time_seconds = int(time_parts[0]) * 60 + int(time_parts[1])
-    elif len(time_parts) == 3:
-        time_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + int(time_parts[2])
+    """Calculate training paces using different methods
+
+    race_time and race_distance accept any format calculator.parsing
+    understands; invalid input gets a 400 naming the field. Optional
+    temperature (F), humidity (%) and elevation_gain (total ft) normalize
+    the race to a flat, neutral-weather equivalent first.
+    pace_unit ("mile", "km", "400m" or "lap") defaults to the user's
+    preferred units.
+    """
+    try:
+        time_seconds, distance_meters, calculator_type = parse_race(request.data)
+        unit = _pace_unit(request, request.data)
+        temperature, humidity, elevation_gain = _parse_conditions(request.data)
+        conditions_factor = float(get_conditions_grid().time_factors(
+            temperature, humidity, gain_per_mile(elevation_gain, distance_meters)
+        ))
+        result = calculate_result(calculator_type, time_seconds / conditions_factor, distance_meters, unit)
+    except ParseError as e:
+        return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    normalized_time = time_seconds / conditions_factor
+    if conditions_factor != 1.0:
+        result['conditions'] = {
+            'time_factor': round(conditions_factor, 4),
+            'normalized_time_seconds': round(normalized_time, 1),
+        }
+    _record(calculator_type, [request.data.get('race_distance')], [normalized_time], [distance_meters], [result])
+    return Response(result)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def condition_adjusted_paces(request):
+    """Training paces for a VDOT, slowed for the conditions they'll be run in
+
+    Accepts vdot plus optional temperature (F), humidity (%) and
+    elevation_per_mile (ft of gain per mile of the route), and pace_unit.
+    """
+    try:
+        data = require_object(request.data)
+        vdot = parse_vdot(data.get('vdot'))
+    except ParseError as e:
+        return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+    try:
+        temperature, humidity, _ = _parse_conditions(data)
+        elevation = _parse_condition(data, 'elevation_per_mile', 0, 1000)
+        unit = _pace_unit(request, data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    factor = float(get_conditions_grid().time_factors(temperature, humidity, elevation))
+    paces = adjusted_training_paces(vdot, temperature, humidity, elevation)
+    return Response({
+        'vdot': vdot,
+        'time_factor': round(factor, 4),
+        'paces': {zone: format_pace(float(seconds), unit) for zone, seconds in paces.items()},
+        'pace_unit': unit,
+    })
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def calculate_paces_batch(request):
+    """Calculate training paces for a list of races in one request
+
+    Accepts {"races": [{race_time, race_distance, calculator_type}, ...]} and
+    returns {"results": [...]} in the same order. Invalid races get an
+    "error" entry instead of failing the whole batch. An optional top-level
+    pace_unit applies to every race.
+    """
+    if isinstance(request.data, dict):
+        races = request.data.get('races')
+        options = request.data
     else:
-        return Response({'error': 'Invalid time format'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Convert distance to meters
-    distance_map = {
-        '5K': 5000,
-        '10K': 10000,
-        '15K': 15000,
-        'Half Marathon': 21097,
-        'Marathon': 42195
-    }
-    
-    distance_meters = distance_map.get(race_distance)
-    if not distance_meters:
-        return Response({'error': 'Invalid distance'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Calculate paces based on selected method
-    if calculator_type == 'daniels_vdot':
-        vdot = VDOTCalculator.calculate_vdot(time_seconds, distance_meters)
-        paces = VDOTCalculator.get_training_paces(vdot)
-        result = {'vdot': vdot, 'paces': paces, 'method': 'Daniels VDOT'}
-        
-    elif calculator_type == 'mcmillan':
-        paces = McMillanCalculator.get_training_paces(time_seconds, distance_meters)
-        equivalent_times = McMillanCalculator.calculate_equivalent_times(time_seconds, distance_meters)
-        result = {'paces': paces, 'equivalent_times': equivalent_times, 'method': 'McMillan'}
-        
-    elif calculator_type == 'riegel':
-        paces = RiegelCalculator.get_training_paces(time_seconds, distance_meters)
-        fitness_factor = RiegelCalculator.calculate_fitness_factor(time_seconds, distance_meters)
-        result = {'paces': paces, 'fitness_factor': fitness_factor, 'method': 'Riegel Formula'}
-        
+        races = request.data
+        options = {}
+    if not isinstance(races, list):
+        return Response({'error': 'races must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        unit = _pace_unit(request, options)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if len(races) > MAX_BATCH_SIZE:
+        return Response(
+            {'error': f'A batch may contain at most {MAX_BATCH_SIZE} races'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    results = [None] * len(races)
+    rows = [race if isinstance(race, dict) else {} for race in races]
+    parsed = parse_races_batch(
+        [race.get('race_time') for race in rows],
+        [race.get('race_distance') for race in rows],
+        [race.get('custom_distance') for race in rows],
+    )
+    groups = {}
+    for index, race in enumerate(races):
+        if not isinstance(race, dict):
+            results[index] = {'error': 'Invalid race'}
+            continue
+        try:
+            if index in parsed.errors:
+                raise parsed.errors[index]
+            calculator_type = parse_calculator_type(race.get('calculator_type'))
+        except ParseError as e:
+            results[index] = e.as_dict()
+            continue
+        groups.setdefault(calculator_type, []).append(
+            (index, parsed.times_seconds[index], parsed.distances_meters[index])
+        )
+
+    # Run each calculator once over all of its races
+    for calculator_type, entries in groups.items():
+        indexes, times, distances = zip(*entries)
+        try:
+            batch_results = calculate_results_batch(calculator_type, times, distances, unit)
+        except ValueError as e:
+            batch_results = [{'error': str(e)}] * len(indexes)
+        for index, result in zip(indexes, batch_results):
+            results[index] = result
+        _record(calculator_type, [races[index].get('race_distance') for index in indexes],
+                times, distances, batch_results)
+
+    return Response({'results': results})
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def predict_race_times(request):
+    """Predict equivalent race times for every standard distance
+
+    Accepts race_time/race_distance like calculate_paces, plus an optional
+    "method" ("vdot" or "riegel") and "distances" list of extra distances
+    in any format race_distance accepts.
+    """
+    try:
+        data = require_object(request.data)
+    except ParseError as e:
+        return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+    method = data.get('method', 'vdot')
+    if method not in PREDICTION_METHODS:
+        return Response({'error': 'Invalid prediction method'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        time_seconds, distance_meters = parse_performance(
+            data.get('race_time'), data.get('race_distance'), data.get('custom_distance')
+        )
+        distances = data.get('distances', [])
+        if not isinstance(distances, list):
+            raise ParseError('distances', 'invalid', 'distances must be a list')
+        extra_distances = [parse_distance(value, field='distances') for value in distances]
+    except ParseError as e:
+        return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+
+    predictions = RacePredictor.prediction_matrix(
+        time_seconds, distance_meters, extra_distances, method=method
+    )
+    return Response({'method': method, 'predictions': predictions})
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def required_race_times(request):
+    """Race times needed to reach a target VDOT
+
+    Query params: target_vdot, and optionally race_distance (a named
+    distance or meters); without it every standard distance is returned.
+    """
+    params = request.query_params
+    try:
+        target_vdot = parse_vdot(params.get('target_vdot'), field='target_vdot')
+    except ParseError as e:
+        return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+
+    race_distance = params.get('race_distance')
+    if race_distance:
+        try:
+            meters = parse_distance(race_distance, params.get('custom_distance'))
+        except ParseError as e:
+            return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        labelled = [(race_distance, meters)]
+    else:
+        labelled = list(STANDARD_DISTANCES)
+
+    times = RacePredictor.required_times(target_vdot, [meters for _, meters in labelled])
+    return Response({
+        'target_vdot': target_vdot,
+        'required_times': [
+            {'distance': label, 'meters': meters, 'time_seconds': round(seconds, 1),
+             'time': format_race_time(seconds)}
+            for (label, meters), seconds in zip(labelled, times.tolist())
+        ],
+    })
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def pace_chart_version(request):
+    """Current version of the static pace chart and the URL it is served at
+
+    Cheap enough to poll; the chart itself is cached forever under its URL.
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        return Response({'error': 'Pace chart has not been built'}, status=status.HTTP_404_NOT_FOUND)
+    response = Response({
+        'version': manifest['version'],
+        'format': manifest['format'],
+        'size': manifest['size'],
+        'url': request.build_absolute_uri(reverse('pace_chart', args=[manifest['version']])),
+    })
+    patch_cache_control(response, public=True, max_age=PACE_CHART_VERSION_MAX_AGE)
+    return response
+
+@require_safe
+def pace_chart(request, version):
+    """Serve a built pace chart; its URL changes with its content, so it never needs revalidating"""
+    path = chart_path(version)
+    if path is None:
+        raise Http404('Unknown pace chart version')
+    etag = f'"{version}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
     else:
-        return Response({'error': 'Invalid calculator type'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    return Response(result)
\ No newline at end of file
+        response = FileResponse(open(path, 'rb'), content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=PACE_CHART_MAX_AGE, immutable=True)
+    return response
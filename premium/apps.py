@@ -1,6 +1,15 @@
 # premium/apps.py
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class PremiumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'premium'
+
+    def ready(self):
+        from runpace_pro.search import install_search_indexes
+        from . import signals  # noqa: F401 (connects cache invalidation receivers)
+        from .models import PLAN_SEARCH_INDEX
+        # SQLite rebuilds tables on some schema changes, dropping the FTS triggers
+        post_migrate.connect(install_search_indexes([PLAN_SEARCH_INDEX]), sender=self,
+                             weak=False, dispatch_uid='premium-search-indexes')
@@ -0,0 +1,105 @@
+# premium/management/commands/benchmark_catalog_queries.py
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import Article, ArticleTag
+from premium.models import PlanCategory, PremiumTrainingPlan
+
+LONG_TEXT = 'Tempo runs, threshold intervals and long runs build aerobic strength. ' * 60
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Compare catalog M2M filters as JOIN + DISTINCT (old) and EXISTS (current): '
+            'query plans and latency on a seeded dataset that is rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Plans and articles to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, rows, repeat, page_size, **options):
+        try:
+            with transaction.atomic():
+                self.seed(rows)
+                for label, before, after in self.cases():
+                    self.compare(label, before[:page_size], after[:page_size], repeat)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        self.stdout.write(f'Seeding {rows} plans and {rows} articles...')
+        author = get_user_model().objects.create(username='catalog-benchmark', email='benchmark@example.com')
+        categories = [PlanCategory.objects.create(name=f'Benchmark category {i}', slug=f'benchmark-category-{i}')
+                      for i in range(5)]
+        tags = [ArticleTag.objects.create(name=f'Benchmark tag {i}', slug=f'benchmark-tag-{i}')
+                for i in range(5)]
+        now = timezone.now()
+
+        plans = PremiumTrainingPlan.objects.bulk_create([
+            PremiumTrainingPlan(
+                title=f'Benchmark plan {i}', slug=f'benchmark-plan-{i}', author=author,
+                distance='marathon', difficulty='intermediate', plan_type='full_cycle',
+                duration_weeks=16, weekly_mileage_range='40-60 miles/week',
+                description=LONG_TEXT, key_features=LONG_TEXT, target_audience=LONG_TEXT,
+                training_philosophy=LONG_TEXT, sample_week=LONG_TEXT, workout_types=LONG_TEXT,
+                progression_strategy=LONG_TEXT, bonus_content=LONG_TEXT,
+                price=49, is_featured=i % 10 == 0,
+            ) for i in range(rows)
+        ])
+        articles = Article.objects.bulk_create([
+            Article(
+                title=f'Benchmark article {i}', slug=f'benchmark-article-{i}', author=author,
+                excerpt='Benchmark', content=LONG_TEXT, status='published',
+                published_at=now - timedelta(minutes=i),
+            ) for i in range(rows)
+        ])
+        # Every row belongs to several categories/tags, which is what makes the join fan out
+        PlanCategory.plans.through.objects.bulk_create([
+            PlanCategory.plans.through(plancategory=category, premiumtrainingplan=plan)
+            for plan in plans for category in categories[:3]
+        ])
+        ArticleTag.articles.through.objects.bulk_create([
+            ArticleTag.articles.through(articletag=tag, article=article)
+            for article in articles for tag in tags[:3]
+        ])
+
+    def cases(self):
+        plans = PremiumTrainingPlan.objects.filter(is_active=True).select_related('author')
+        articles = Article.objects.filter(status='published').select_related('author', 'category')
+        return [
+            ('Plans by category',
+             plans.filter(categories__slug='benchmark-category-0').distinct(),
+             plans.in_category('benchmark-category-0')),
+            ('Articles by tag',
+             articles.filter(tags__slug='benchmark-tag-0').distinct(),
+             articles.tagged('benchmark-tag-0')),
+        ]
+
+    def compare(self, label, before, after, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+        timings = {}
+        for name, queryset in (('JOIN + DISTINCT', before), ('EXISTS', after)):
+            self.stdout.write(f'  {name} query plan:')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())  # fresh clone, no result cache
+                samples.append(time.perf_counter() - start)
+            timings[name] = statistics.median(samples) * 1000
+        self.stdout.write(
+            f"  median latency: JOIN + DISTINCT {timings['JOIN + DISTINCT']:.2f} ms, "
+            f"EXISTS {timings['EXISTS']:.2f} ms"
+        )
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from runpace_pro.search import SearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("premium", "0001_initial"),
+    ]
+
+    operations = [
+        SearchIndex(
+            "premium_premiumtrainingplan", {"title": "A", "key_features": "B", "description": "C"}
+        ).migration_operation(),
+    ]
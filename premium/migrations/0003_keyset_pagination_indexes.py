@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("premium", "0002_premiumtrainingplan_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="premiumtrainingplan",
+            index=models.Index(
+                fields=["is_active", "-is_featured", "-created_at", "-id"],
+                name="premium_pre_is_acti_1bbae5_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchasedplan",
+            index=models.Index(
+                fields=["user", "-purchased_at", "-id"],
+                name="premium_pur_user_id_82a324_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("premium", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="purchasedplan",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Client Idempotency-Key of the purchase request",
+                max_length=255,
+                null=True,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="purchasedplan",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("idempotency_key__isnull", False)),
+                fields=("user", "idempotency_key"),
+                name="unique_purchase_idempotency_key",
+            ),
+        ),
+    ]
@@ -1,12 +1,35 @@
 # premium/models.py
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.urls import reverse
 from decimal import Decimal
+from runpace_pro.search import SearchIndex
 
 User = get_user_model()
 
+class PremiumTrainingPlanQuerySet(models.QuerySet):
+    def with_testimonial_count(self):
+        """Annotate featured_testimonial_count with a correlated subquery
+        
+        A subquery (rather than Count over a join) stays correct when the
+        queryset is later filtered through categories or other relations.
+        """
+        featured = PlanTestimonial.objects.filter(
+            plan=models.OuterRef('pk'), is_featured=True
+        ).order_by().values('plan').annotate(count=models.Count('pk')).values('count')
+        return self.annotate(
+            featured_testimonial_count=Coalesce(models.Subquery(featured), 0)
+        )
+    
+    def in_category(self, slug):
+        """Plans in the category, filtered with EXISTS so no DISTINCT is needed"""
+        memberships = PlanCategory.plans.through.objects.filter(
+            premiumtrainingplan=models.OuterRef('pk'), plancategory__slug=slug
+        )
+        return self.filter(models.Exists(memberships))
+
 class PremiumTrainingPlan(models.Model):
     """Premium training plans for purchase"""
     DIFFICULTY_CHOICES = [
@@ -84,12 +107,23 @@ class PremiumTrainingPlan(models.Model):
     view_count = models.PositiveIntegerField(default=0)
     purchase_count = models.PositiveIntegerField(default=0)
     
+    objects = PremiumTrainingPlanQuerySet.as_manager()
+    
+    # Columns read by the pricing properties (see runpace_pro.querysets)
+    FIELD_DEPENDENCIES = {
+        'current_price': ('price', 'sale_price', 'is_on_sale'),
+        'savings': ('price', 'sale_price', 'is_on_sale'),
+        'savings_percentage': ('price', 'sale_price', 'is_on_sale'),
+    }
+    
     class Meta:
         ordering = ['-is_featured', '-created_at']
         indexes = [
             models.Index(fields=['is_active', 'is_featured']),
             models.Index(fields=['distance', 'difficulty']),
             models.Index(fields=['plan_type', 'is_active']),
+            # Keyset pagination of active plans (PlanCursorPagination)
+            models.Index(fields=['is_active', '-is_featured', '-created_at', '-id']),
         ]
     
     def save(self, *args, **kwargs):
@@ -124,6 +158,11 @@ class PremiumTrainingPlan(models.Model):
     def __str__(self):
         return self.title
 
+# Full-text index behind ?search= on plans (see migration 0002)
+PLAN_SEARCH_INDEX = SearchIndex(
+    'premium_premiumtrainingplan', {'title': 'A', 'key_features': 'B', 'description': 'C'}
+)
+
 class PlanTestimonial(models.Model):
     """Customer testimonials for premium plans"""
     plan = models.ForeignKey(PremiumTrainingPlan, on_delete=models.CASCADE, related_name='testimonials')
@@ -151,6 +190,8 @@ class PurchasedPlan(models.Model):
     # Payment tracking (integrate with your payment processor)
     payment_id = models.CharField(max_length=100, blank=True)
     payment_status = models.CharField(max_length=50, default='completed')
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True,
+                                       help_text="Client Idempotency-Key of the purchase request")
     
     # Access control
     access_granted = models.BooleanField(default=True)
@@ -159,6 +200,24 @@ class PurchasedPlan(models.Model):
     class Meta:
         unique_together = ('user', 'plan')
         ordering = ['-purchased_at']
+        indexes = [
+            # Keyset pagination of a user's purchases (PurchaseCursorPagination)
+            models.Index(fields=['user', '-purchased_at', '-id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='unique_purchase_idempotency_key'
+            ),
+        ]
+    
+    @classmethod
+    def plan_ids_for(cls, user):
+        """Ids of every plan the user has purchased (empty for anonymous users)"""
+        if not user or not user.is_authenticated:
+            return frozenset()
+        return frozenset(cls.objects.filter(user=user).values_list('plan_id', flat=True))
     
     def __str__(self):
         return f"{self.user.email} - {self.plan.title}"
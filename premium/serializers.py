@@ -1,4 +1,5 @@
 # premium/serializers.py
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
 from .models import PremiumTrainingPlan, PlanTestimonial, PurchasedPlan, PlanCategory
 
@@ -13,7 +14,22 @@ class PlanTestimonialSerializer(serializers.ModelSerializer):
         fields = ['id', 'customer_name', 'customer_location', 'testimonial', 
                  'race_result', 'improvement', 'created_at']
 
-class PremiumTrainingPlanListSerializer(serializers.ModelSerializer):
+class PurchasedFlagMixin:
+    """is_purchased from the requesting user's plan ids, loaded once per request
+    
+    The viewset normally supplies `purchased_plan_ids` in the context; otherwise
+    the ids are loaded on first use and shared through the (root) context.
+    """
+    
+    def get_is_purchased(self, obj):
+        purchased_plan_ids = self.context.get('purchased_plan_ids')
+        if purchased_plan_ids is None:
+            request = self.context.get('request')
+            purchased_plan_ids = PurchasedPlan.plan_ids_for(getattr(request, 'user', None))
+            self.context['purchased_plan_ids'] = purchased_plan_ids
+        return obj.pk in purchased_plan_ids
+
+class PremiumTrainingPlanListSerializer(PurchasedFlagMixin, serializers.ModelSerializer):
     """Lightweight serializer for plan listings"""
     author_name = serializers.CharField(source='author.get_full_name', read_only=True)
     categories = PlanCategorySerializer(many=True, read_only=True)
@@ -21,6 +37,7 @@ class PremiumTrainingPlanListSerializer(serializers.ModelSerializer):
     current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     savings = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     savings_percentage = serializers.IntegerField(read_only=True)
+    is_purchased = serializers.SerializerMethodField()
     
     class Meta:
         model = PremiumTrainingPlan
@@ -28,12 +45,24 @@ class PremiumTrainingPlanListSerializer(serializers.ModelSerializer):
                  'plan_type', 'duration_weeks', 'weekly_mileage_range', 'description',
                  'key_features', 'target_audience', 'price', 'current_price', 
                  'is_on_sale', 'savings', 'savings_percentage', 'featured_image',
-                 'categories', 'testimonial_count', 'purchase_count', 'view_count']
+                 'categories', 'testimonial_count', 'purchase_count', 'view_count',
+                 'is_purchased']
+        # testimonial_count reads the featured_testimonial_count annotation,
+        # is_purchased the per-request purchased_plan_ids
+        field_dependencies = {'testimonial_count': (), 'is_purchased': ()}
     
     def get_testimonial_count(self, obj):
-        return obj.testimonials.filter(is_featured=True).count()
+        # Annotated by PremiumTrainingPlanQuerySet.with_testimonial_count();
+        # counting here instead would cost a query per plan
+        try:
+            return obj.featured_testimonial_count
+        except AttributeError:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} needs plans loaded with "
+                f"PremiumTrainingPlan.objects.with_testimonial_count()"
+            )
 
-class PremiumTrainingPlanDetailSerializer(serializers.ModelSerializer):
+class PremiumTrainingPlanDetailSerializer(PurchasedFlagMixin, serializers.ModelSerializer):
     """Full serializer for plan detail view"""
     author_name = serializers.CharField(source='author.get_full_name', read_only=True)
     categories = PlanCategorySerializer(many=True, read_only=True)
@@ -54,14 +83,12 @@ class PremiumTrainingPlanDetailSerializer(serializers.ModelSerializer):
                  'view_count', 'is_purchased']
     
     def get_testimonials(self, obj):
-        featured_testimonials = obj.testimonials.filter(is_featured=True)[:3]
+        # Prefetched by PremiumTrainingPlanViewSet for the detail view
+        featured_testimonials = getattr(obj, 'featured_testimonials', None)
+        if featured_testimonials is None:
+            featured_testimonials = obj.testimonials.filter(is_featured=True)
+        featured_testimonials = featured_testimonials[:3]
         return PlanTestimonialSerializer(featured_testimonials, many=True).data
-    
-    def get_is_purchased(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return PurchasedPlan.objects.filter(user=request.user, plan=obj).exists()
-        return False
 
 class PurchasedPlanSerializer(serializers.ModelSerializer):
     plan = PremiumTrainingPlanListSerializer(read_only=True)
@@ -0,0 +1,60 @@
+# premium/services.py
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import PremiumTrainingPlan, PurchasedPlan
+
+
+class AlreadyPurchased(ValueError):
+    """The user already owns the plan (under a different or no idempotency key)"""
+
+
+class IdempotencyKeyReused(ValueError):
+    """The idempotency key was already used for a different plan"""
+
+
+class PurchaseService:
+    """Record plan purchases exactly once"""
+
+    @staticmethod
+    def purchase(user, plan, idempotency_key=None):
+        """Create the purchase and bump the plan's purchase_count in one transaction
+
+        Duplicates are caught by the (user, plan) and (user, idempotency_key)
+        unique constraints rather than a racy pre-check. Returns
+        (purchase, created); a retry with the same key returns the original
+        purchase with created=False.
+        """
+        if idempotency_key:
+            # Fast path for client retries: one indexed read, no write
+            replay = PurchaseService._replay(user, plan, idempotency_key)
+            if replay is not None:
+                return replay, False
+
+        try:
+            with transaction.atomic():
+                purchase = PurchasedPlan.objects.create(
+                    user=user,
+                    plan=plan,
+                    purchase_price=plan.current_price,
+                    payment_status='completed',
+                    idempotency_key=idempotency_key or None
+                )
+                PremiumTrainingPlan.objects.filter(id=plan.id).update(
+                    purchase_count=F('purchase_count') + 1
+                )
+        except IntegrityError:
+            # A concurrent request won; it was either a retry or a real duplicate
+            if idempotency_key:
+                replay = PurchaseService._replay(user, plan, idempotency_key)
+                if replay is not None:
+                    return replay, False
+            raise AlreadyPurchased('You have already purchased this plan')
+        return purchase, True
+
+    @staticmethod
+    def _replay(user, plan, idempotency_key):
+        purchase = PurchasedPlan.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        if purchase is not None and purchase.plan_id != plan.id:
+            raise IdempotencyKeyReused('Idempotency-Key was already used for a different plan')
+        return purchase
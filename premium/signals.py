@@ -0,0 +1,18 @@
+# premium/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from runpace_pro.http_cache import invalidate_namespace
+from .models import PlanCategory, PlanTestimonial, PremiumTrainingPlan
+
+
+@receiver(post_save, sender=PremiumTrainingPlan)
+@receiver(post_delete, sender=PremiumTrainingPlan)
+@receiver(post_save, sender=PlanCategory)
+@receiver(post_delete, sender=PlanCategory)
+@receiver(post_save, sender=PlanTestimonial)
+@receiver(post_delete, sender=PlanTestimonial)
+@receiver(m2m_changed, sender=PlanCategory.plans.through)
+def invalidate_premium_responses(sender, **kwargs):
+    """Drop cached premium catalog responses when plans, categories or testimonials change"""
+    invalidate_namespace('premium')
@@ -0,0 +1,205 @@
+# premium/tests.py
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.test import APITestCase
+
+from .models import PLAN_SEARCH_INDEX, PlanCategory, PlanTestimonial, PremiumTrainingPlan, PurchasedPlan
+from .serializers import PremiumTrainingPlanListSerializer
+from .services import PurchaseService
+
+User = get_user_model()
+
+
+class CatalogQueryCountTests(APITestCase):
+    """Catalog endpoints cost a fixed number of queries however many plans they render"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='coach', email='coach@example.com')
+        cls.user = User.objects.create(username='runner', email='runner@example.com')
+        cls.category = PlanCategory.objects.create(name='Marathon', slug='marathon')
+        other = PlanCategory.objects.create(name='Speed', slug='speed')
+        cls.plans = [
+            PremiumTrainingPlan.objects.create(
+                title=f'Tempo plan {i}', slug=f'tempo-plan-{i}', author=cls.author,
+                distance='marathon', difficulty='intermediate', plan_type='full_cycle',
+                duration_weeks=16, weekly_mileage_range='40-60 miles/week',
+                description='Threshold work for the marathon', key_features='Tempo runs',
+                target_audience='Runners', training_philosophy='Aerobic base',
+                sample_week='Easy, tempo, long', workout_types='Tempo',
+                progression_strategy='Build', price=49, is_featured=i % 5 == 0,
+            )
+            for i in range(15)
+        ]
+        for plan in cls.plans:
+            plan.categories.add(cls.category, other)
+            PlanTestimonial.objects.bulk_create([
+                PlanTestimonial(plan=plan, customer_name=f'Runner {n}', testimonial='Great plan',
+                                is_featured=n < 2)
+                for n in range(3)
+            ])
+        for plan in cls.plans[:5]:
+            PurchasedPlan.objects.create(user=cls.user, plan=plan, purchase_price=49)
+        # The FTS5 table probe runs once per process; keep it out of the counts below
+        PLAN_SEARCH_INDEX.search(PremiumTrainingPlan.objects.all(), 'tempo')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_plan_list(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/premium/plans/')
+        self.assertEqual(len(response.data['results']), 15)
+        self.assertEqual(response.data['results'][0]['testimonial_count'], 2)
+
+    def test_plan_list_by_category(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/premium/plans/', {'category': 'marathon'})
+        self.assertEqual(len(response.data['results']), 15)
+
+    def test_plan_search(self):
+        # Ranked search pages by number, still without a COUNT(*)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/premium/plans/', {'search': 'tempo'})
+        self.assertEqual(list(response.data), ['next', 'results'])
+        self.assertEqual(len(response.data['results']), 15)
+
+    def test_malformed_cursor_or_page_is_a_bad_request(self):
+        for params in (
+            {'cursor': 'not-a-cursor'},
+            {'cursor': 'WzFd'},
+            {'cursor': 'W251bGwsbnVsbCxudWxsXQ=='},  # [null, null, null]
+            {'search': 'tempo', 'page': 'x'},
+            {'search': 'tempo', 'page': '0'},
+        ):
+            response = self.client.get('/api/premium/plans/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_purchased_plans(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/premium/purchased/')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertTrue(all(purchase['plan']['is_purchased'] for purchase in response.data['results']))
+
+    def test_plan_detail(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/premium/plans/{self.plans[0].slug}/')
+        self.assertEqual(len(response.data['testimonials']), 2)
+        self.assertTrue(response.data['is_purchased'])
+
+    def test_list_serializer_requires_testimonial_count_annotation(self):
+        plan = PremiumTrainingPlan.objects.get(pk=self.plans[0].pk)
+        with self.assertRaises(ImproperlyConfigured):
+            PremiumTrainingPlanListSerializer(plan, context={'purchased_plan_ids': frozenset()}).data
+
+
+class CatalogCacheVariantTests(APITestCase):
+    """Cached listings are public unless the user's purchases change them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='coach', email='coach@example.com')
+        cls.buyer = User.objects.create(username='buyer', email='buyer@example.com')
+        cls.browser = User.objects.create(username='browser', email='browser@example.com')
+        plan = PremiumTrainingPlan.objects.create(
+            title='Speed plan', slug='speed-plan', author=author, distance='5k',
+            difficulty='intermediate', plan_type='full_cycle', duration_weeks=8,
+            weekly_mileage_range='20-30 miles/week', description='Speed', key_features='Intervals',
+            target_audience='Runners', training_philosophy='Speed', sample_week='Intervals',
+            workout_types='Intervals', progression_strategy='Build', price=29, is_featured=True,
+        )
+        PurchasedPlan.objects.create(user=cls.buyer, plan=plan, purchase_price=29)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_featured(self, user=None):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/premium/plans/featured/')
+
+    def test_anonymous_and_non_buyers_share_a_public_response(self):
+        anonymous = self.get_featured()
+        browser = self.get_featured(self.browser)
+        for response in (anonymous, browser):
+            self.assertIn('public', response['Cache-Control'])
+            self.assertIn('Last-Modified', response)
+            self.assertIn('Cookie', response['Vary'])
+            self.assertFalse(response.data[0]['is_purchased'])
+        self.assertEqual(anonymous['ETag'], browser['ETag'])
+
+    def test_buyers_get_a_private_response(self):
+        anonymous = self.get_featured()
+        buyer = self.get_featured(self.buyer)
+        self.assertIn('private', buyer['Cache-Control'])
+        self.assertNotIn('Last-Modified', buyer)
+        self.assertTrue(buyer.data[0]['is_purchased'])
+        self.assertNotEqual(anonymous['ETag'], buyer['ETag'])
+
+
+class PurchaseTests(APITestCase):
+    """Purchases are recorded once, however often the client retries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='coach', email='coach@example.com')
+        cls.user = User.objects.create(username='runner', email='runner@example.com')
+        cls.plan, cls.other_plan = [
+            PremiumTrainingPlan.objects.create(
+                title=f'Speed plan {i}', slug=f'speed-plan-{i}', author=author, distance='5k',
+                difficulty='intermediate', plan_type='full_cycle', duration_weeks=8,
+                weekly_mileage_range='20-30 miles/week', description='Speed', key_features='Intervals',
+                target_audience='Runners', training_philosophy='Speed', sample_week='Intervals',
+                workout_types='Intervals', progression_strategy='Build', price=29,
+            )
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def purchase(self, plan, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(f'/api/premium/plans/{plan.slug}/purchase/', **headers)
+
+    def assertPurchaseCount(self, plan, count):
+        plan.refresh_from_db()
+        self.assertEqual(plan.purchase_count, count)
+
+    def test_retry_with_the_same_key_replays_the_purchase(self):
+        first = self.purchase(self.plan, 'key-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first)
+        retry = self.purchase(self.plan, 'key-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(PurchasedPlan.objects.count(), 1)
+        self.assertPurchaseCount(self.plan, 1)
+
+    def test_key_reused_for_another_plan_is_unprocessable(self):
+        self.purchase(self.plan, 'key-1')
+        response = self.purchase(self.other_plan, 'key-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertPurchaseCount(self.other_plan, 0)
+
+    def test_duplicate_without_a_key_is_a_bad_request(self):
+        self.assertEqual(self.purchase(self.plan).status_code, 201)
+        for key in (None, 'key-2'):
+            response = self.purchase(self.plan, key)
+            self.assertEqual(response.status_code, 400, key)
+            self.assertEqual(response.data['error'], 'You have already purchased this plan')
+        self.assertPurchaseCount(self.plan, 1)
+
+    def test_concurrent_retry_replays_after_the_insert_fails(self):
+        original, _ = PurchaseService.purchase(self.user, self.plan, 'key-1')
+        # As if the retry's fast-path read ran before the first request committed
+        replays = [None, PurchaseService._replay(self.user, self.plan, 'key-1')]
+        with mock.patch.object(PurchaseService, '_replay', side_effect=replays):
+            purchase, created = PurchaseService.purchase(self.user, self.plan, 'key-1')
+        self.assertEqual((purchase, created), (original, False))
+        self.assertPurchaseCount(self.plan, 1)
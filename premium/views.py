@@ -1,6 +1,6 @@
 # premium/views.py
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, F
+from django.db.models import F, Prefetch
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
@@ -10,7 +10,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 import stripe
 import json
-from .models import PremiumTrainingPlan, PlanTestimonial, PurchasedPlan, PlanCategory
+from runpace_pro.counters import get_view_counter
+from runpace_pro.http_cache import cached_response
+from runpace_pro.pagination import KeysetPagination
+from runpace_pro.querysets import only_serialized
+from .models import PremiumTrainingPlan, PlanTestimonial, PurchasedPlan, PlanCategory, PLAN_SEARCH_INDEX
+from .services import AlreadyPurchased, IdempotencyKeyReused, PurchaseService
 from .serializers import (PremiumTrainingPlanListSerializer, PremiumTrainingPlanDetailSerializer,
                          PlanTestimonialSerializer, PurchasedPlanSerializer, PlanCategorySerializer)
 
@@ -20,17 +25,35 @@ class PlanCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = PlanCategorySerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
+    
+    @cached_response('premium')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+class PlanCursorPagination(KeysetPagination):
+    ordering = ('-is_featured', '-created_at', '-id')
 
 class PremiumTrainingPlanViewSet(viewsets.ReadOnlyModelViewSet):
     """Premium training plans"""
     queryset = PremiumTrainingPlan.objects.filter(is_active=True)
     permission_classes = [AllowAny]
+    pagination_class = PlanCursorPagination
     lookup_field = 'slug'
     
     def get_queryset(self):
         queryset = super().get_queryset().select_related(
             'author'
-        ).prefetch_related('categories', 'testimonials')
+        ).prefetch_related('categories').with_testimonial_count()
+        
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(Prefetch(
+                'testimonials',
+                queryset=PlanTestimonial.objects.filter(is_featured=True),
+                to_attr='featured_testimonials'
+            ))
+        else:
+            # Skip the long-form content columns listings don't render
+            queryset = only_serialized(queryset, PremiumTrainingPlanListSerializer)
         
         # Filter by distance
         distance = self.request.query_params.get('distance', None)
@@ -47,36 +70,52 @@ class PremiumTrainingPlanViewSet(viewsets.ReadOnlyModelViewSet):
         if plan_type:
             queryset = queryset.filter(plan_type=plan_type)
         
-        # Filter by category
+        # Filter by category (EXISTS rather than a join, so rows aren't duplicated)
         category = self.request.query_params.get('category', None)
         if category:
-            queryset = queryset.filter(categories__slug=category)
+            queryset = queryset.in_category(category)
         
-        # Search functionality
+        # Search functionality (ranked full-text search, best match first)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(key_features__icontains=search)
-            )
+            queryset = PLAN_SEARCH_INDEX.search(queryset, search)
         
-        return queryset.distinct()
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return PremiumTrainingPlanDetailSerializer
         return PremiumTrainingPlanListSerializer
     
+    def get_purchased_plan_ids(self):
+        """The requesting user's purchased plan ids, queried once per request"""
+        if not hasattr(self, '_purchased_plan_ids'):
+            self._purchased_plan_ids = PurchasedPlan.plan_ids_for(self.request.user)
+        return self._purchased_plan_ids
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['purchased_plan_ids'] = self.get_purchased_plan_ids()
+        return context
+    
+    def cache_variant(self, request):
+        # Cached listings only differ between users through is_purchased, so
+        # users without purchases share the anonymous (public) response
+        purchased = self.get_purchased_plan_ids()
+        return ','.join(map(str, sorted(purchased))) if purchased else None
+    
     def retrieve(self, request, *args, **kwargs):
         """Get plan detail and increment view count"""
         instance = self.get_object()
-        # Increment view count
-        PremiumTrainingPlan.objects.filter(id=instance.id).update(view_count=F('view_count') + 1)
-        serializer = self.get_serializer(instance, context={'request': request})
+        # Increment view count (buffered and flushed in batches)
+        counter = get_view_counter()
+        counter.increment(PremiumTrainingPlan, instance.id)
+        instance.view_count += counter.pending(PremiumTrainingPlan, instance.id)
+        serializer = self.get_serializer(instance)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('premium')
     def featured(self, request):
         """Get featured plans"""
         featured_plans = self.get_queryset().filter(is_featured=True)[:6]
@@ -84,6 +123,7 @@ class PremiumTrainingPlanViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('premium')
     def popular(self, request):
         """Get most popular plans"""
         popular_plans = self.get_queryset().order_by('-purchase_count', '-view_count')[:10]
@@ -91,6 +131,7 @@ class PremiumTrainingPlanViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('premium')
     def on_sale(self, request):
         """Get plans on sale"""
         sale_plans = self.get_queryset().filter(is_on_sale=True)
@@ -99,44 +140,56 @@ class PremiumTrainingPlanViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def purchase(self, request, slug=None):
-        """Purchase a premium plan"""
-        plan = self.get_object()
-        user = request.user
+        """Purchase a premium plan
         
-        # Check if already purchased
-        if PurchasedPlan.objects.filter(user=user, plan=plan).exists():
+        Clients may send an Idempotency-Key header; retrying with the same
+        key returns the original purchase instead of an error.
+        """
+        plan = self.get_object()
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip() or None
+        if idempotency_key and len(idempotency_key) > 255:
             return Response(
-                {'error': 'You have already purchased this plan'}, 
+                {'error': 'Idempotency-Key must be at most 255 characters'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Here you would integrate with your payment processor
         # For now, we'll create a purchase record
-        purchase = PurchasedPlan.objects.create(
-            user=user,
-            plan=plan,
-            purchase_price=plan.current_price,
-            payment_status='completed'
-        )
+        try:
+            purchase, created = PurchaseService.purchase(request.user, plan, idempotency_key)
+        except IdempotencyKeyReused as e:
+            return Response({'error': str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        except AlreadyPurchased as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update plan purchase count
-        PremiumTrainingPlan.objects.filter(id=plan.id).update(
-            purchase_count=F('purchase_count') + 1
-        )
-        
-        serializer = PurchasedPlanSerializer(purchase)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        # A replayed purchase loads its plan without the list serializer's annotations
+        purchase.plan = plan
+        serializer = PurchasedPlanSerializer(purchase, context=self.get_serializer_context())
+        response = Response(serializer.data, status=status.HTTP_201_CREATED)
+        if not created:
+            response['Idempotent-Replayed'] = 'true'
+        return response
+
+class PurchaseCursorPagination(KeysetPagination):
+    ordering = ('-purchased_at', '-id')
 
 class PurchasedPlanViewSet(viewsets.ReadOnlyModelViewSet):
     """User's purchased plans"""
     serializer_class = PurchasedPlanSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PurchaseCursorPagination
     
     def get_queryset(self):
+        # Load the nested plans with everything the list serializer reads
+        plans = PremiumTrainingPlan.objects.select_related('author').prefetch_related(
+            'categories'
+        ).with_testimonial_count()
+        if self.action != 'download':
+            plans = only_serialized(plans, PremiumTrainingPlanListSerializer)
         return PurchasedPlan.objects.filter(
             user=self.request.user,
             access_granted=True
-        ).select_related('plan')
+        ).prefetch_related(Prefetch('plan', queryset=plans))
     
     @action(detail=True, methods=['post'])
     def download(self, request, pk=None):
@@ -1 +1,12 @@
-# This file makes the runpace_pro directory a Python package 
\ No newline at end of file
+# This file makes the runpace_pro directory a Python package
+
+# Load the Celery app when Celery is installed so @shared_task binds to it
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+# Enable WAL and sane sync settings on every SQLite connection
+from . import sqlite  # noqa: F401,E402
+
+__all__ = ('celery_app',)
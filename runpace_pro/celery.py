@@ -0,0 +1,10 @@
+# runpace_pro/celery.py
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'runpace_pro.settings')
+
+app = Celery('runpace_pro')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
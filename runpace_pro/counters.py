@@ -0,0 +1,73 @@
+# runpace_pro/counters.py
+"""Buffered counter increments for hot analytics columns
+
+Page views are aggregated per (model, field, row) in process memory and a
+daemon thread periodically writes the summed deltas with one UPDATE per
+model and field, instead of one UPDATE per view. Pending deltas are
+flushed when the worker exits.
+"""
+import logging
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .flushers import BackgroundFlusher
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedCounter(BackgroundFlusher):
+    """Aggregate counter increments in memory and flush them in batches"""
+
+    thread_name = 'counter-flusher'
+
+    def __init__(self, flush_interval=10.0):
+        super().__init__(flush_interval)
+        # (model, field) -> {pk: delta}
+        self._deltas = defaultdict(lambda: defaultdict(int))
+
+    def increment(self, model, pk, field='view_count', amount=1):
+        """Queue an increment of `field` on one row"""
+        self._ensure_started()
+        with self._lock:
+            self._deltas[(model, field)][pk] += amount
+
+    def pending(self, model, pk, field='view_count'):
+        """Increments for a row that haven't reached the database yet"""
+        with self._lock:
+            deltas = self._deltas.get((model, field))
+            return deltas.get(pk, 0) if deltas else 0
+
+    def flush(self):
+        """Write all pending deltas; returns the number of rows updated"""
+        with self._flush_lock:
+            with self._lock:
+                batches, self._deltas = self._deltas, defaultdict(lambda: defaultdict(int))
+            updated = 0
+            close_old_connections()
+            for (model, field), deltas in batches.items():
+                try:
+                    updated += model.objects.filter(pk__in=list(deltas)).update(**{
+                        field: F(field) + Case(
+                            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                            default=Value(0),
+                            output_field=IntegerField(),
+                        )
+                    })
+                except Exception:
+                    logger.exception('Dropped %d %s.%s counter updates',
+                                     len(deltas), model.__name__, field)
+            return updated
+
+    def _discard_pending(self):
+        self._deltas.clear()
+
+
+@lru_cache(maxsize=None)
+def get_view_counter():
+    """Return the process-wide view counter configured in settings"""
+    options = getattr(settings, 'VIEW_COUNTER', {})
+    return BufferedCounter(flush_interval=options.get('FLUSH_INTERVAL', 10.0))
@@ -0,0 +1,71 @@
+# runpace_pro/flushers.py
+"""Background flushing shared by the write-behind buffers
+
+BackgroundFlusher owns the thread plumbing: a daemon thread per worker
+process that calls flush() every flush_interval seconds or when woken,
+restarted after fork, and a final flush when the process exits.
+Subclasses keep their pending data under self._lock, implement flush()
+and _discard_pending(), and call _ensure_started() whenever they queue
+something.
+"""
+import atexit
+import os
+import threading
+
+
+class BackgroundFlusher:
+    """Base for in-memory buffers written out by a background thread"""
+
+    thread_name = 'background-flusher'
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        # Guards the subclass's pending data
+        self._lock = threading.Lock()
+        # Serializes flushes from the thread, stop() and callers
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def flush(self):
+        """Write everything pending; returns the number of rows written"""
+        raise NotImplementedError
+
+    def _discard_pending(self):
+        """Drop everything pending without writing it; called with self._lock held"""
+        raise NotImplementedError
+
+    def wake(self):
+        """Flush now instead of waiting for the interval"""
+        self._wakeup.set()
+
+    def stop(self):
+        """Stop the flusher thread and write out whatever is left"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval)
+        self.flush()
+
+    def _ensure_started(self):
+        # Threads don't survive fork, so a preloaded parent's flusher is
+        # restarted in each worker; the parent flushes what it had queued
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._discard_pending()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,131 @@
+# runpace_pro/http_cache.py
+"""Cached, conditional responses for public catalog endpoints
+
+Each cached endpoint belongs to a namespace ('blog', 'premium') whose
+version is the time it was last invalidated. Model signals bump the
+version, which orphans every cached response in the namespace at once and
+changes the ETag/Last-Modified that clients revalidate against.
+
+Versions only invalidate across worker processes when they live in a
+shared cache backend; the system check below warns when they don't.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def _options():
+    options = getattr(settings, 'HTTP_RESPONSE_CACHE', {})
+    return caches[options.get('CACHE_ALIAS', 'default')], options.get('TIMEOUT', 300)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when namespace versions would be local to each worker process"""
+    alias = getattr(settings, 'HTTP_RESPONSE_CACHE', {}).get('CACHE_ALIAS', 'default')
+    if settings.DEBUG or alias not in settings.CACHES or not isinstance(caches[alias], LocMemCache):
+        return []
+    return [Warning(
+        f"HTTP_RESPONSE_CACHE uses the local-memory cache '{alias}'.",
+        hint='Each worker process keeps its own namespace versions, so an invalidation '
+             'only reaches the process that handled it. Point CACHE_ALIAS at a shared '
+             'backend (set REDIS_CACHE_URL).',
+        id='runpace_pro.W001',
+    )]
+
+
+def _version_key(namespace):
+    return f'http-cache:version:{namespace}'
+
+
+def namespace_version(namespace):
+    """Invalidation timestamp of a namespace, starting a new one if none is cached"""
+    cache, timeout = _options()
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = int(time.time())
+        # The version expires with the responses, so data that changes without
+        # a signal (view and purchase counters) is refreshed after TIMEOUT
+        if not cache.add(_version_key(namespace), version, timeout):
+            version = cache.get(_version_key(namespace), version)
+    return version
+
+
+def invalidate_namespace(namespace):
+    """Orphan every cached response in a namespace once the current transaction commits
+
+    Bumping earlier would let a request that still sees the old rows cache
+    them under the new version; a rolled-back write bumps nothing.
+    """
+    transaction.on_commit(lambda: _bump_version(namespace))
+
+
+def _bump_version(namespace):
+    cache, timeout = _options()
+    version = int(time.time())
+    # Two invalidations within a second must still produce a new version
+    previous = cache.get(_version_key(namespace))
+    if previous is not None and previous >= version:
+        version = previous + 1
+    cache.set(_version_key(namespace), version, timeout)
+
+
+def cached_response(namespace):
+    """Cache a GET view method's response data, answering revalidations with 304
+
+    The full request path and query string form the cache key. Views whose
+    data differs between users define `cache_variant(request)`, returning a
+    string that is equal for every user who would get the same data, or
+    None when the request gets the same data as an anonymous one. Only
+    responses with a variant are marked private.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            cache, timeout = _options()
+            version = namespace_version(namespace)
+            varies = hasattr(self, 'cache_variant')
+            variant = self.cache_variant(request) if varies else None
+            personalized = variant is not None
+            url_hash = hashlib.md5(f'{request.get_full_path()}|{variant or ""}'.encode('utf-8')).hexdigest()
+            etag = quote_etag(f'{namespace}-{version}-{url_hash}')
+            # The namespace version can't tell when a user's own data changed
+            last_modified = None if personalized else version
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return _add_validators(not_modified, etag, last_modified, varies, personalized)
+
+            key = f'http-cache:{namespace}:{version}:{url_hash}'
+            data = cache.get(key)
+            if data is None:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data, timeout)
+            else:
+                response = Response(data)
+            return _add_validators(response, etag, last_modified, varies, personalized)
+        return wrapper
+    return decorator
+
+
+def _add_validators(response, etag, last_modified, varies, personalized):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Shared caches must not hand a public copy to a user who'd get a personalized one
+    if varies:
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+    # Clients may keep the body but must revalidate before reusing it
+    patch_cache_control(response, no_cache=True, **{'private' if personalized else 'public': True})
+    return response
@@ -0,0 +1,139 @@
+# runpace_pro/pagination.py
+"""Keyset pagination for infinite-scroll listings
+
+Each page filters on the sort key of the last row it returned instead of
+using OFFSET, and no COUNT(*) is run, so fetching any page costs
+O(page size) with a matching index. The ordering must end in a unique
+column. Nullable keys sort last in either direction.
+
+Requests that can't be paged by key (relevance-ranked search) are paged
+by number instead, with the same {next, results} response and still no
+COUNT(*). A malformed cursor or page number is a 400.
+"""
+import base64
+import binascii
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only cursor pagination over a multi-column ordering"""
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    # Requests with any of these params use page numbers instead (e.g. relevance-ranked search)
+    fallback_params = ('search',)
+    page_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+    invalid_page_message = 'Invalid page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number = None
+        if any(param in request.query_params for param in self.fallback_params):
+            self.page_number = self.decode_page_number(request)
+            offset = (self.page_number - 1) * self.page_size
+            return self._take(queryset[offset:offset + self.page_size + 1])
+
+        self.model = queryset.model
+        loaded_fields, deferring = queryset.query.deferred_loading
+        if not deferring:
+            # only() querysets must still load the sort keys for the next cursor
+            queryset = queryset.only(*loaded_fields, *(name for name, _ in self._keys()))
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor))
+        queryset = queryset.order_by(*(
+            F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+            for name, descending in self._keys()
+        ))
+
+        return self._take(queryset[:self.page_size + 1])
+
+    def _take(self, queryset):
+        # One row past the page tells whether there is a next one
+        results = list(queryset)
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number is not None:
+            return replace_query_param(url, self.page_query_param, self.page_number + 1)
+        last = self.page[-1]
+        values = [
+            None if getattr(last, name) is None else self.model._meta.get_field(name).value_to_string(last)
+            for name, _ in self._keys()
+        ]
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            keys = self._keys()
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise ValueError
+            fields = [self.model._meta.get_field(name) for name, _ in keys]
+            if any(value is None and not field.null for field, value in zip(fields, values)):
+                raise ValueError
+            return [None if value is None else field.to_python(value) for field, value in zip(fields, values)]
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise exceptions.ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+
+    def decode_page_number(self, request):
+        value = request.query_params.get(self.page_query_param) or '1'
+        if not value.isdigit() or int(value) < 1:
+            raise exceptions.ValidationError({self.page_query_param: [self.invalid_page_message]})
+        return int(value)
+
+    def _keys(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _after(self, cursor):
+        """Rows sorting strictly after the cursor: (k1, k2, ...) > (v1, v2, ...)"""
+        conditions = []
+        equal = Q()
+        for (name, descending), value in zip(self._keys(), cursor):
+            if value is None:
+                # Nulls sort last, so only later keys can move past a null
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            if self.model._meta.get_field(name).null:
+                beyond |= Q(**{f'{name}__isnull': True})
+            conditions.append(equal & beyond)
+            equal &= Q(**{name: value})
+        # A cursor of all nulls has nothing after it
+        return reduce(operator.or_, conditions, Q(pk__in=[]))
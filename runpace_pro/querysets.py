@@ -0,0 +1,56 @@
+# runpace_pro/querysets.py
+"""Column pruning for querysets driven by serializer fields
+
+`serializer_columns()` resolves every field a ModelSerializer renders to
+the model columns it reads, so list endpoints can load rows with only()
+instead of pulling every TextField. Sources that aren't model fields must
+declare what they read:
+
+- model properties in `Model.FIELD_DEPENDENCIES`
+- SerializerMethodFields in the serializer's `Meta.field_dependencies`
+
+Anything undeclared raises ImproperlyConfigured rather than silently
+triggering a deferred-field query per row.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+
+
+@lru_cache(maxsize=None)
+def serializer_columns(serializer_class):
+    """Names of the model columns read when rendering `serializer_class`"""
+    model = serializer_class.Meta.model
+    serializer_dependencies = getattr(serializer_class.Meta, 'field_dependencies', {})
+    model_dependencies = getattr(model, 'FIELD_DEPENDENCIES', {})
+
+    columns = {model._meta.pk.name}
+    for name, field in serializer_class().fields.items():
+        if name in serializer_dependencies:
+            columns.update(serializer_dependencies[name])
+            continue
+        if field.source == '*':
+            raise ImproperlyConfigured(
+                f"{serializer_class.__name__}.{name} reads the whole object; "
+                f"declare the columns it needs in Meta.field_dependencies"
+            )
+        attr = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if attr not in model_dependencies:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} reads {model.__name__}.{attr}; "
+                    f"declare the columns it needs in {model.__name__}.FIELD_DEPENDENCIES"
+                )
+            columns.update(model_dependencies[attr])
+            continue
+        # Many-to-many and reverse relations are prefetched by primary key
+        if model_field.concrete and not model_field.many_to_many:
+            columns.add(model_field.name)
+    return tuple(sorted(columns))
+
+
+def only_serialized(queryset, serializer_class):
+    """Restrict `queryset` to the columns `serializer_class` renders"""
+    return queryset.only(*serializer_columns(serializer_class))
@@ -0,0 +1,179 @@
+# runpace_pro/search.py
+"""Ranked full-text search over text columns
+
+PostgreSQL uses a GIN index on a weighted to_tsvector() expression, which
+the database keeps current on every write. SQLite uses an FTS5 table with
+external content that triggers keep in sync with the base table. Any other
+backend (or SQLite built without FTS5) falls back to icontains filtering.
+"""
+import logging
+import re
+
+from django.db import OperationalError, connections, migrations
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# bm25() column weights matching PostgreSQL's default ts_rank() weights
+FTS5_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+SEARCH_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# (database alias, FTS5 table) -> whether the table exists
+_fts5_tables = {}
+
+
+class SearchIndex:
+    """Full-text index over weighted columns of one table"""
+
+    def __init__(self, table, columns, config='english'):
+        self.table = table
+        self.columns = dict(columns)  # column -> weight ('A' highest .. 'D')
+        self.config = config
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    @property
+    def gin_index(self):
+        return f'{self.table}_search_idx'
+
+    def tsvector_sql(self, qn):
+        """Weighted tsvector expression; queries must repeat it exactly to use the index"""
+        return ' || '.join(
+            f"setweight(to_tsvector('{self.config}'::regconfig, coalesce({qn(self.table)}.{qn(column)}, '')), '{weight}')"
+            for column, weight in self.columns.items()
+        )
+
+    # Schema
+
+    def install(self, schema_editor):
+        """Create the index; safe to run again to restore missing SQLite triggers"""
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            qn = schema_editor.quote_name
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {qn(self.gin_index)} ON {qn(self.table)} '
+                f'USING GIN (({self.tsvector_sql(qn)}))'
+            )
+        elif vendor == 'sqlite':
+            try:
+                self._install_fts5(schema_editor)
+            except OperationalError:
+                logger.warning('SQLite FTS5 unavailable, %s search falls back to LIKE', self.table)
+
+    def uninstall(self, schema_editor):
+        vendor = schema_editor.connection.vendor
+        qn = schema_editor.quote_name
+        if vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {qn(self.gin_index)}')
+        elif vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {qn(f"{self.fts_table}_{suffix}")}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {qn(self.fts_table)}')
+
+    def _install_fts5(self, schema_editor):
+        qn = schema_editor.quote_name
+        table, fts = qn(self.table), qn(self.fts_table)
+        columns = ', '.join(qn(column) for column in self.columns)
+        new_values = ', '.join(f'new.{qn(column)}' for column in self.columns)
+        old_values = ', '.join(f'old.{qn(column)}' for column in self.columns)
+        created = self.fts_table not in schema_editor.connection.introspection.table_names()
+
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+            f"content={table}, content_rowid='id', tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {qn(self.fts_table + "_ai")} AFTER INSERT ON {table} BEGIN '
+            f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {qn(self.fts_table + "_ad")} AFTER DELETE ON {table} BEGIN '
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        # Only re-index when a searched column changes, not on counter updates
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {qn(self.fts_table + "_au")} AFTER UPDATE OF {columns} ON {table} BEGIN '
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END'
+        )
+        if created:
+            schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    def migration_operation(self):
+        """RunPython operation creating the index for the migrating database"""
+        return migrations.RunPython(
+            lambda apps, schema_editor: self.install(schema_editor),
+            lambda apps, schema_editor: self.uninstall(schema_editor),
+        )
+
+    # Queries
+
+    def search(self, queryset, terms):
+        """Filter `queryset` to rows matching `terms`, annotated with `search_rank`
+
+        Results are ordered best match first.
+        """
+        connection = connections[queryset.db]
+        words = SEARCH_TERM_RE.findall(terms)
+        if not words:
+            return queryset.none()
+
+        qn = connection.ops.quote_name
+        if connection.vendor == 'postgresql':
+            vector = self.tsvector_sql(qn)
+            query = f"websearch_to_tsquery('{self.config}'::regconfig, %s)"
+            queryset = queryset.filter(
+                RawSQL(f'({vector}) @@ {query}', (terms,), output_field=BooleanField())
+            ).annotate(
+                search_rank=RawSQL(f'ts_rank(({vector}), {query})', (terms,), output_field=FloatField())
+            )
+        elif connection.vendor == 'sqlite' and self._has_fts5(connection):
+            # Quote every word so user input can't inject FTS5 query syntax
+            match = ' '.join('"%s"' % word for word in words)
+            fts = qn(self.fts_table)
+            weights = ', '.join(str(FTS5_WEIGHTS[weight]) for weight in self.columns.values())
+            queryset = queryset.filter(
+                pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (match,))
+            ).annotate(
+                # bm25() scores better matches lower; negate so rank sorts like ts_rank
+                search_rank=RawSQL(
+                    f'SELECT -bm25({fts}, {weights}) FROM {fts} '
+                    f'WHERE {fts} MATCH %s AND rowid = {qn(self.table)}.{qn("id")}',
+                    (match,), output_field=FloatField()
+                )
+            )
+        else:
+            query = Q()
+            for column in self.columns:
+                query |= Q(**{f'{column}__icontains': terms})
+            queryset = queryset.filter(query).annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return queryset.order_by('-search_rank', *queryset.model._meta.ordering)
+
+    def _has_fts5(self, connection):
+        # The table list only changes on migrate, which resets the cache
+        key = (connection.alias, self.fts_table)
+        if key not in _fts5_tables:
+            _fts5_tables[key] = self.fts_table in connection.introspection.table_names()
+        return _fts5_tables[key]
+
+
+def install_search_indexes(indexes):
+    """post_migrate receiver restoring FTS5 triggers dropped by SQLite table rebuilds
+
+    Indexes that were never installed (or were migrated away) are left alone.
+    """
+    def receiver(using, **kwargs):
+        connection = connections[using]
+        _fts5_tables.clear()
+        if connection.vendor != 'sqlite':
+            return
+        tables = connection.introspection.table_names()
+        with connection.schema_editor() as schema_editor:
+            for index in indexes:
+                if index.fts_table in tables:
+                    index.install(schema_editor)
+    return receiver
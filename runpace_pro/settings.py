@@ -90,6 +90,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Seconds a writer waits for the database lock before failing
+            'timeout': 20,
+        },
     }
 }
 
@@ -114,6 +118,64 @@ CORS_ALLOWED_ORIGINS = [
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379')
 
+# Background plan generation: 'celery' when a broker is configured, otherwise a local thread pool
+PLAN_GENERATION_BACKEND = config(
+    'PLAN_GENERATION_BACKEND', default='celery' if config('REDIS_URL', default='') else 'thread'
+)
+PLAN_GENERATION_THREADS = config('PLAN_GENERATION_THREADS', default=2, cast=int)
+# Seconds a pending/running job may go without progress before it is failed as stale
+PLAN_GENERATION_JOB_TIMEOUT = config('PLAN_GENERATION_JOB_TIMEOUT', default=600, cast=int)
+
+# Daniels VDOT chart used by the calculator lookup table
+VDOT_CHART_PATH = BASE_DIR / 'veedots - Sheet2 (1).csv'
+
+# Cache Configuration
+# Per-process memory by default; set REDIS_CACHE_URL to share across workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='')
+if REDIS_CACHE_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+    }
+
+# Memoized calculator results, keyed on (calculator_type, meters, seconds)
+CALCULATOR_RESULT_CACHE = {
+    'MAX_SIZE': config('CALCULATOR_CACHE_MAX_SIZE', default=2048, cast=int),
+    'TTL': config('CALCULATOR_CACHE_TTL', default=3600, cast=int),
+    # Set to a CACHES alias (e.g. 'default' with Redis) to share results between workers
+    'CACHE_ALIAS': config('CALCULATOR_CACHE_ALIAS', default='') or None,
+}
+
+# Write-behind analytics recording of calculator requests (calculator.recording)
+PACE_CALCULATION_RECORDING = {
+    'ENABLED': config('PACE_CALCULATION_RECORDING', default=True, cast=bool),
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 5.0,  # seconds
+    'MAX_PENDING': 10000,
+}
+
+# Cached public catalog responses (runpace_pro.http_cache), invalidated by model signals.
+# Invalidation only reaches every worker through a shared cache (REDIS_CACHE_URL)
+HTTP_RESPONSE_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': config('HTTP_RESPONSE_CACHE_TIMEOUT', default=300, cast=int),  # seconds
+}
+
+# Article and premium plan view counts are buffered in memory and flushed in batches
+VIEW_COUNTER = {
+    'FLUSH_INTERVAL': config('VIEW_COUNTER_FLUSH_INTERVAL', default=10.0, cast=float),  # seconds
+}
+
+# Content-hashed pace chart written by `manage.py build_pace_chart` (calculator.pace_chart)
+PACE_CHART = {
+    'OUTPUT_DIR': config('PACE_CHART_DIR', default=str(BASE_DIR / 'pace_chart')),
+}
+
 # Static files configuration
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -0,0 +1,19 @@
+# runpace_pro/sqlite.py
+"""Per-connection SQLite tuning for concurrent writers
+
+WAL lets readers proceed while a write transaction is open, and the busy
+timeout (DATABASES OPTIONS 'timeout') makes competing writers queue for
+the lock instead of failing with "database is locked".
+"""
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created, dispatch_uid='runpace-sqlite-pragmas')
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        # journal_mode is persistent in the file; in-memory databases ignore it
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
@@ -0,0 +1,216 @@
+# runpace_pro/tests.py
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from blog.models import ARTICLE_SEARCH_INDEX, Article
+
+from .counters import BufferedCounter
+from .flushers import BackgroundFlusher
+from .http_cache import check_shared_cache, invalidate_namespace, namespace_version
+from .pagination import KeysetPagination
+
+User = get_user_model()
+
+
+class ListFlusher(BackgroundFlusher):
+    thread_name = 'test-flusher'
+
+    def __init__(self, flush_interval=3600):
+        super().__init__(flush_interval)
+        self.pending = []
+        self.written = []
+        self.flushed = threading.Event()
+
+    def add(self, item):
+        self._ensure_started()
+        with self._lock:
+            self.pending.append(item)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self.pending = self.pending, []
+            self.written.extend(batch)
+            self.flushed.set()
+            return len(batch)
+
+    def _discard_pending(self):
+        self.pending.clear()
+
+
+class BackgroundFlusherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.flusher = ListFlusher()
+        self.addCleanup(self.flusher.stop)
+
+    def test_wake_flushes_from_the_thread(self):
+        self.flusher.add(1)
+        self.flusher.wake()
+        self.assertTrue(self.flusher.flushed.wait(5))
+        self.assertEqual(self.flusher.written, [1])
+        self.assertEqual(self.flusher._thread.name, 'test-flusher')
+
+    def test_stop_writes_what_is_left(self):
+        self.flusher.add(1)
+        self.flusher.add(2)
+        self.flusher.stop()
+        self.assertFalse(self.flusher._thread.is_alive())
+        self.assertEqual(self.flusher.written, [1, 2])
+
+    def test_restarts_and_discards_inherited_rows_in_a_new_process(self):
+        self.flusher.add(1)
+        parent_thread = self.flusher._thread
+        # As seen from a forked worker: the parent's pid and rows, but no thread
+        self.flusher._pid = -1
+        self.flusher.add(2)
+        self.assertIsNot(self.flusher._thread, parent_thread)
+        self.assertEqual(self.flusher.pending, [2])
+
+
+class BufferedCounterTests(TestCase):
+
+    def test_flush_sums_increments_per_row(self):
+        author = User.objects.create(username='writer', email='writer@example.com')
+        articles = [
+            Article.objects.create(title=f'Article {i}', author=author, excerpt='Excerpt', content='Content')
+            for i in range(2)
+        ]
+        counter = BufferedCounter(flush_interval=3600)
+        self.addCleanup(counter.stop)
+        for _ in range(3):
+            counter.increment(Article, articles[0].pk)
+        counter.increment(Article, articles[1].pk, amount=5)
+        self.assertEqual(counter.pending(Article, articles[0].pk), 3)
+
+        self.assertEqual(counter.flush(), 2)
+        self.assertEqual(counter.pending(Article, articles[0].pk), 0)
+        self.assertEqual(
+            list(Article.objects.order_by('pk').values_list('view_count', flat=True)), [3, 5]
+        )
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    @override_settings(DEBUG=False, CACHES=LOCMEM)
+    def test_warns_on_local_memory_cache(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['runpace_pro.W001'])
+
+    @override_settings(DEBUG=False, CACHES={
+        **LOCMEM, 'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                             'LOCATION': '/tmp/runpace-http-cache-check'},
+    }, HTTP_RESPONSE_CACHE={'CACHE_ALIAS': 'shared'})
+    def test_shared_backend_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(DEBUG=True, CACHES=LOCMEM)
+    def test_local_memory_is_fine_in_development(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+@override_settings(HTTP_RESPONSE_CACHE={'CACHE_ALIAS': 'default', 'TIMEOUT': 300})
+class InvalidateNamespaceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_is_bumped_on_commit(self):
+        version = namespace_version('blog')
+        with self.captureOnCommitCallbacks() as callbacks:
+            invalidate_namespace('blog')
+            invalidate_namespace('blog')
+            self.assertEqual(namespace_version('blog'), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreaterEqual(namespace_version('blog'), version + 2)
+
+    def test_rolled_back_write_keeps_the_version(self):
+        version = namespace_version('blog')
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    invalidate_namespace('blog')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(namespace_version('blog'), version)
+
+
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='writer', email='writer@example.com')
+        cls.in_content = Article.objects.create(
+            title='Marathon base', author=author, excerpt='Excerpt', content='Add a tempo run every week'
+        )
+        cls.in_title = Article.objects.create(
+            title='Tempo runs explained', author=author, excerpt='Excerpt', content='Comfortably hard'
+        )
+
+    def setUp(self):
+        if not ARTICLE_SEARCH_INDEX._has_fts5(connection):
+            self.skipTest('SQLite FTS5 index not installed')
+
+    def search(self, terms):
+        return list(ARTICLE_SEARCH_INDEX.search(Article.objects.all(), terms))
+
+    def test_title_matches_rank_first(self):
+        results = self.search('tempo')
+        self.assertEqual(results, [self.in_title, self.in_content])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_triggers_follow_updates_and_deletes(self):
+        self.in_title.title = 'Threshold runs explained'
+        self.in_title.save()
+        self.assertEqual(self.search('tempo'), [self.in_content])
+        self.assertEqual(self.search('threshold'), [self.in_title])
+        self.in_content.delete()
+        self.assertEqual(self.search('tempo'), [])
+
+
+class KeysetPaginationTests(TestCase):
+
+    class Pagination(KeysetPagination):
+        ordering = ('-created_at', '-id')
+        page_size = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='writer', email='writer@example.com')
+        for i in range(5):
+            Article.objects.create(title=f'Article {i}', author=author, excerpt='Excerpt', content='Content')
+
+    def paginate(self, url):
+        pagination = self.Pagination()
+        request = Request(APIRequestFactory().get(url))
+        page = pagination.paginate_queryset(Article.objects.all(), request)
+        return [article.title for article in page], pagination.get_paginated_response([]).data
+
+    def walk(self, url):
+        titles = []
+        while url:
+            page, data = self.paginate(url)
+            self.assertEqual(list(data), ['next', 'results'])
+            titles += page
+            url = data['next']
+        return titles
+
+    def test_cursor_and_page_modes_share_one_shape(self):
+        by_cursor = self.walk('/articles/')
+        self.assertEqual(by_cursor, [f'Article {i}' for i in reversed(range(5))])
+        self.assertEqual(self.walk('/articles/?search=article'), by_cursor)
+
+    def test_malformed_cursor_is_a_validation_error(self):
+        # Garbage, and [null, null] for keys that can't be null
+        for cursor in ('%%%', 'W251bGwsbnVsbF0='):
+            with self.assertRaises(ValidationError):
+                self.paginate(f'/articles/?cursor={cursor}')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TrainingPlan, Workout
+from .models import PlanGenerationJob, TrainingPlan, Workout
 
 @admin.register(TrainingPlan)
 class TrainingPlanAdmin(admin.ModelAdmin):
@@ -11,4 +11,10 @@ class TrainingPlanAdmin(admin.ModelAdmin):
 class WorkoutAdmin(admin.ModelAdmin):
     list_display = ('training_plan', 'day', 'workout_type', 'description')
     list_filter = ('workout_type', 'day')
-    search_fields = ('description', 'training_plan__name') 
\ No newline at end of file
+    search_fields = ('description', 'training_plan__name') 
+
+@admin.register(PlanGenerationJob)
+class PlanGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('user', 'plan_type', 'target_vdot', 'weeks', 'status', 'created_at')
+    list_filter = ('status', 'plan_type', 'created_at')
+    search_fields = ('user__username',)
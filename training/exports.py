@@ -0,0 +1,104 @@
+# training/exports.py
+"""Streaming exports of training plan workouts
+
+Each exporter consumes an iterator of workout rows (dicts from
+Workout.objects.values(...).iterator()) and yields encoded chunks, so
+StreamingHttpResponse can send plans of any size with flat memory.
+"""
+import csv
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+EXPORT_FIELDS = ('training_plan_id', 'training_plan__name', 'training_plan__created_at',
+                 'week', 'day', 'workout_type', 'description', 'distance',
+                 'target_pace', 'notes')
+
+CSV_COLUMNS = ('plan_id', 'plan_name', 'week', 'day', 'date', 'workout_type',
+               'description', 'distance_miles', 'target_pace', 'notes')
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer that hands each row straight back"""
+
+    def write(self, value):
+        return value
+
+
+def workout_date(row, start_date=None):
+    """Calendar date of a workout: week 1, day 1 falls on the start date"""
+    if start_date is None:
+        created_at = row['training_plan__created_at']
+        start_date = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+    return start_date + timedelta(weeks=row['week'] - 1, days=row['day'] - 1)
+
+
+def _csv_row(row, start_date):
+    return (row['training_plan_id'], row['training_plan__name'], row['week'], row['day'],
+            workout_date(row, start_date).isoformat(), row['workout_type'],
+            row['description'], row['distance'], row['target_pace'], row['notes'])
+
+
+def stream_csv(rows, start_date=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow(_csv_row(row, start_date))
+
+
+def stream_jsonl(rows, start_date=None):
+    for row in rows:
+        yield json.dumps(dict(zip(CSV_COLUMNS, _csv_row(row, start_date)))) + '\n'
+
+
+def _ics_escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _ics_line(line):
+    """Fold a content line at 75 octets as RFC 5545 requires"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74  # continuation lines start with a space
+        # Don't split a multi-byte character
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def stream_ics(rows, start_date=None):
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+    yield _ics_line('BEGIN:VCALENDAR')
+    yield _ics_line('VERSION:2.0')
+    yield _ics_line('PRODID:-//Unforgiving Minute//Training Plans//EN')
+    yield _ics_line('CALSCALE:GREGORIAN')
+    for row in rows:
+        date = workout_date(row, start_date)
+        summary = f"{row['workout_type'].title()} - {row['distance']:g} mi @ {row['target_pace']}"
+        yield ''.join((
+            _ics_line('BEGIN:VEVENT'),
+            _ics_line(f"UID:plan{row['training_plan_id']}-w{row['week']}-d{row['day']}@unforgivingminute"),
+            _ics_line(f'DTSTAMP:{stamp}'),
+            _ics_line(f"DTSTART;VALUE=DATE:{date.strftime('%Y%m%d')}"),
+            _ics_line(f"DTEND;VALUE=DATE:{(date + timedelta(days=1)).strftime('%Y%m%d')}"),
+            _ics_line(f'SUMMARY:{_ics_escape(summary)}'),
+            _ics_line(f"DESCRIPTION:{_ics_escape(row['description'])}"),
+            _ics_line('END:VEVENT'),
+        ))
+    yield _ics_line('END:VCALENDAR')
+
+
+# file_format -> (streamer, content type, file extension)
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ics': (stream_ics, 'text/calendar', 'ics'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson', 'jsonl'),
+}
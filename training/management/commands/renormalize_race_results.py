@@ -0,0 +1,15 @@
+# training/management/commands/renormalize_race_results.py
+from django.core.management.base import BaseCommand
+
+from training.services import RaceHistoryNormalizer
+
+
+class Command(BaseCommand):
+    help = 'Recompute calculated_vdot for every race result from its race conditions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        updated = RaceHistoryNormalizer.renormalize(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Updated calculated_vdot for {updated} race results'))
@@ -1,5 +1,8 @@
 
 # training/models.py
+import math
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -14,6 +17,13 @@ class RaceResult(models.Model):
         ('marathon', 'Marathon'),
         ('custom', 'Custom'),
     ]
+    DISTANCE_METERS = {
+        '5K': 5000,
+        '10K': 10000,
+        '15K': 15000,
+        'half_marathon': 21097.5,
+        'marathon': 42195,
+    }
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     distance = models.CharField(max_length=20, choices=DISTANCE_CHOICES)
@@ -26,6 +36,23 @@ class RaceResult(models.Model):
     humidity = models.IntegerField(null=True, blank=True)  # percentage
     calculated_vdot = models.FloatField()
     created_at = models.DateTimeField(auto_now_add=True)
+    
+    @property
+    def distance_meters(self):
+        if self.distance == 'custom':
+            return self.custom_distance
+        return self.DISTANCE_METERS.get(self.distance)
+    
+    def save(self, *args, **kwargs):
+        # Score the race as if run flat in neutral weather
+        from .services import RaceHistoryNormalizer
+        vdot = float(RaceHistoryNormalizer.normalized_vdots([self])[0])
+        if not math.isnan(vdot):
+            self.calculated_vdot = vdot
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'calculated_vdot'}
+        super().save(*args, **kwargs)
 
 class TrainingPlan(models.Model):
     PLAN_TYPES = [
@@ -63,3 +90,35 @@ class Workout(models.Model):
     distance = models.FloatField()  # in miles
     target_pace = models.CharField(max_length=20)  # format: MM:SS
     notes = models.TextField(blank=True)
+
+class PlanGenerationJob(models.Model):
+    """Background training plan generation request"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ('pending', 'running')
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    plan_type = models.CharField(max_length=20, choices=TrainingPlan.PLAN_TYPES)
+    target_vdot = models.FloatField()
+    weeks = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    plan = models.ForeignKey(TrainingPlan, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # One in-flight job per user and plan request; duplicates reuse it
+            models.UniqueConstraint(
+                fields=['user', 'plan_type', 'target_vdot', 'weeks'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_plan_generation_job',
+            ),
+        ]
@@ -0,0 +1,368 @@
+# training/plan_templates.py
+"""Declarative week templates for every TrainingPlan.PLAN_TYPES entry
+
+Each plan type declares its mileage range, how the plan is split into
+periodization phases, and one week structure per phase. compile_plan()
+turns a template into per-week skeletons (distances resolved, pace
+placeholders left in the descriptions) and caches them per
+(plan_type, weeks), so generating a plan only substitutes paces.
+
+Quality sessions are sized from the day they land on: the number of reps,
+minutes or race-pace miles grows with the day's distance up to the
+template's full session, and a day too short for the smallest session is
+lengthened to fit it.
+"""
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+from calculator.vdot_chart import METERS_PER_MILE
+
+PHASES = ('base', 'build', 'peak', 'taper')
+
+# Which training pace each workout type is run at
+WORKOUT_PACE_ZONES = {
+    'easy': 'easy',
+    'long': 'easy',
+    'recovery': 'easy',
+    'marathon': 'marathon',
+    'threshold': 'threshold',
+    'interval': 'interval',
+    'repetition': 'repetition',
+}
+
+# Every fourth week before the taper is a cutback week
+CUTBACK_EVERY = 4
+CUTBACK_FACTOR = 0.8
+# Taper weeks step down from the first to the last factor
+TAPER_START_FACTOR = 0.75
+TAPER_END_FACTOR = 0.5
+
+# Easy running around a quality session (warm-up plus cool-down)
+WARMUP_COOLDOWN_MILES = 1.5
+# Pace used to turn threshold minutes into miles when sizing a session
+SIZING_MINUTES_PER_MILE = 7.0
+
+# Quality work within a day: between `fewest` and `most` units of `miles`
+# each, with `recovery` miles between units. {count} in the description
+# becomes the number of units times `step`.
+Work = namedtuple('Work', ['miles', 'recovery', 'fewest', 'most', 'step'])
+
+
+def reps(meters, recovery_meters, fewest, most):
+    """Repeats of `meters` with `recovery_meters` of jogging or standing between them"""
+    return Work(meters / METERS_PER_MILE, recovery_meters / METERS_PER_MILE, fewest, most, 1)
+
+
+def minutes(fewest, most, step=5):
+    """A continuous block of minutes, sized in `step`-minute increments"""
+    return Work(step / SIZING_MINUTES_PER_MILE, 0.0, fewest // step, most // step, step)
+
+
+def segment(fewest, most):
+    """A continuous stretch of whole miles within the run"""
+    return Work(1.0, 0.0, fewest, most, 1)
+
+
+# Days are (day, workout_type, description, share of the weekly mileage[, Work]).
+# Descriptions may use {distance}, {count} (with a Work) and any pace zone
+# ({easy}, {threshold}, ...).
+PLAN_TEMPLATES = {
+    '5k': {
+        'mileage': (20, 35),
+        'phases': {'base': 0.35, 'build': 0.35, 'peak': 0.15, 'taper': 0.15},
+        'weeks': {
+            'base': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.15),
+                (2, 'easy', "Easy run {distance} miles at {easy} pace with 6x20s strides", 0.15),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.10),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.15, minutes(10, 15)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m jog", 0.11, reps(200, 200, 3, 6)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.22),
+            ),
+            'build': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.14),
+                (2, 'interval', "{count}x1000m at {interval} pace with 400m jog recovery", 0.17, reps(1000, 400, 3, 5)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.11),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.14, minutes(10, 20)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.10),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m walk", 0.12, reps(200, 200, 4, 8)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.22),
+            ),
+            'peak': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.14),
+                (2, 'interval', "{count}x800m at {interval} pace with 400m jog recovery", 0.17, reps(800, 400, 3, 6)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (4, 'threshold', "{count}x1 mile at {threshold} pace with 1 minute rest", 0.15, reps(METERS_PER_MILE, 0, 2, 3)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.10),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m walk", 0.12, reps(200, 200, 5, 10)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.20),
+            ),
+            'taper': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.15),
+                (2, 'interval', "{count}x800m at {interval} pace with 400m jog recovery", 0.18, reps(800, 400, 2, 4)),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.12),
+                (4, 'threshold', "{count}x1 mile at {threshold} pace with 1 minute rest", 0.15, reps(METERS_PER_MILE, 0, 2, 2)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m walk", 0.10, reps(200, 200, 3, 6)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.18),
+            ),
+        },
+    },
+    '10k': {
+        'mileage': (25, 45),
+        'phases': {'base': 0.35, 'build': 0.35, 'peak': 0.15, 'taper': 0.15},
+        'weeks': {
+            'base': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.15),
+                (2, 'easy', "Easy run {distance} miles at {easy} pace with 6x20s strides", 0.14),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.15, minutes(10, 20)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m jog", 0.10, reps(200, 200, 4, 8)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.25),
+            ),
+            'build': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.13),
+                (2, 'interval', "{count}x1200m at {interval} pace with 400m jog recovery", 0.17, reps(1200, 400, 3, 5)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.11),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.15, minutes(10, 25)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (6, 'easy', "Easy run {distance} miles at {easy} pace with 6x20s strides", 0.11),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.24),
+            ),
+            'peak': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.13),
+                (2, 'interval', "{count}x1 mile at {interval} pace with 3 minute jog", 0.18, reps(METERS_PER_MILE, 400, 2, 4)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.11),
+                (4, 'threshold', "{count}x1 mile at {threshold} pace with 1 minute rest", 0.16, reps(METERS_PER_MILE, 0, 2, 4)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (6, 'repetition', "{count}x300m at {repetition} pace with 300m jog", 0.11, reps(300, 300, 4, 8)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.22),
+            ),
+            'taper': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.15),
+                (2, 'interval', "{count}x1200m at {interval} pace with 400m jog recovery", 0.17, reps(1200, 400, 2, 3)),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.11),
+                (4, 'threshold', "{count}x1.5 miles at {threshold} pace with 2 minute rest", 0.16, reps(1.5 * METERS_PER_MILE, 0, 2, 2)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m walk", 0.09, reps(200, 200, 3, 6)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.20),
+            ),
+        },
+    },
+    'half_marathon': {
+        'mileage': (25, 50),
+        'phases': {'base': 0.35, 'build': 0.35, 'peak': 0.17, 'taper': 0.13},
+        'weeks': {
+            'base': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.14),
+                (2, 'easy', "Easy run {distance} miles at {easy} pace with 6x20s strides", 0.13),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.15, minutes(10, 20)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.28),
+            ),
+            'build': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.13),
+                (2, 'interval', "{count}x1000m at {interval} pace with 400m jog recovery", 0.14, reps(1000, 400, 3, 5)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.11),
+                (4, 'threshold', "{count}x2 miles at {threshold} pace with 2 minute rest", 0.16, reps(2 * METERS_PER_MILE, 0, 2, 3)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.08),
+                (6, 'easy', "Easy run {distance} miles at {easy} pace with 6x20s strides", 0.10),
+                (7, 'long', "Long run {distance} miles with the last {count} at {marathon} pace", 0.28, segment(2, 3)),
+            ),
+            'peak': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (2, 'interval', "{count}x1 mile at {interval} pace with 3 minute jog", 0.14, reps(METERS_PER_MILE, 400, 2, 4)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.11),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.17, minutes(20, 40)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.08),
+                (6, 'marathon', "{distance} miles with {count} at {marathon} pace", 0.10, segment(2, 4)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.28),
+            ),
+            'taper': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.15),
+                (2, 'interval', "{count}x1 mile at {interval} pace with 3 minute jog", 0.15, reps(METERS_PER_MILE, 400, 2, 3)),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.11),
+                (4, 'threshold', "{count}x2 miles at {threshold} pace with 2 minute rest", 0.17, reps(2 * METERS_PER_MILE, 0, 2, 2)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.08),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.22),
+            ),
+        },
+    },
+    'marathon': {
+        'mileage': (30, 60),
+        'phases': {'base': 0.30, 'build': 0.35, 'peak': 0.20, 'taper': 0.15},
+        'weeks': {
+            'base': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.14),
+                (2, 'easy', "Easy run {distance} miles at {easy} pace with 6x20s strides", 0.13),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.14, minutes(10, 20)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.08),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.30),
+            ),
+            'build': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (2, 'marathon', "{distance} miles with {count} at {marathon} pace", 0.16, segment(3, 6)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.11),
+                (4, 'threshold', "{count}x2 miles at {threshold} pace with 2 minute rest", 0.14, reps(2 * METERS_PER_MILE, 0, 2, 3)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.08),
+                (6, 'easy', "Easy run {distance} miles at {easy} pace", 0.09),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.30),
+            ),
+            'peak': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.11),
+                (2, 'marathon', "{distance} miles with {count} at {marathon} pace", 0.18, segment(5, 10)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.10),
+                (4, 'threshold', "{count}x2 miles at {threshold} pace with 2 minute rest", 0.15, reps(2 * METERS_PER_MILE, 0, 2, 4)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.08),
+                (6, 'interval', "{count}x1000m at {interval} pace with 400m jog recovery", 0.09, reps(1000, 400, 3, 5)),
+                (7, 'long', "Long run {distance} miles with the last {count} at {marathon} pace", 0.29, segment(3, 6)),
+            ),
+            'taper': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.14),
+                (2, 'marathon', "{distance} miles with {count} at {marathon} pace", 0.17, segment(3, 5)),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.10),
+                (4, 'threshold', "{count}x2 miles at {threshold} pace with 2 minute rest", 0.15, reps(2 * METERS_PER_MILE, 0, 2, 2)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.08),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.24),
+            ),
+        },
+    },
+    # General fitness plan for runners without a specific goal race
+    'custom': {
+        'mileage': (20, 35),
+        'phases': {'base': 0.50, 'build': 0.35, 'peak': 0.15, 'taper': 0.0},
+        'weeks': {
+            'base': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.16),
+                (2, 'easy', "Easy run {distance} miles at {easy} pace with 6x20s strides", 0.15),
+                (3, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.10),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.15, minutes(10, 15)),
+                (5, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (6, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.10),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.22),
+            ),
+            'build': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.15),
+                (2, 'interval', "{count}x800m at {interval} pace with 400m jog recovery", 0.15, reps(800, 400, 3, 5)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (4, 'threshold', "{count} minutes at {threshold} pace within {distance} miles", 0.15, minutes(10, 20)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m walk", 0.12, reps(200, 200, 4, 8)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.22),
+            ),
+            'peak': (
+                (1, 'easy', "Easy run {distance} miles at {easy} pace", 0.14),
+                (2, 'interval', "{count}x1000m at {interval} pace with 400m jog recovery", 0.16, reps(1000, 400, 3, 5)),
+                (3, 'easy', "Easy run {distance} miles at {easy} pace", 0.12),
+                (4, 'threshold', "{count}x1 mile at {threshold} pace with 1 minute rest", 0.15, reps(METERS_PER_MILE, 0, 2, 3)),
+                (5, 'recovery', "Recovery run {distance} miles at {easy} pace or slower", 0.09),
+                (6, 'repetition', "{count}x200m at {repetition} pace with 200m walk", 0.12, reps(200, 200, 5, 10)),
+                (7, 'long', "Long run {distance} miles at {easy} pace", 0.22),
+            ),
+        },
+    },
+}
+
+TemplateDay = namedtuple('TemplateDay', ['day', 'workout_type', 'description', 'share', 'work'], defaults=(None,))
+WeekSkeleton = namedtuple('WeekSkeleton', ['week', 'phase', 'mileage', 'workouts'])
+# description has {distance} resolved; only pace placeholders remain
+WorkoutSkeleton = namedtuple('WorkoutSkeleton', ['day', 'workout_type', 'description', 'distance', 'pace_zone'])
+
+
+def allocate_phases(phase_shares, weeks):
+    """Split `weeks` into consecutive phases in proportion to their shares"""
+    total = sum(phase_shares.get(phase, 0) for phase in PHASES)
+    allocation = []
+    cumulative = 0.0
+    start = 0
+    for phase in PHASES:
+        share = phase_shares.get(phase, 0)
+        if not share:
+            continue
+        cumulative += share
+        end = round(cumulative / total * weeks)
+        allocation.extend([phase] * (end - start))
+        start = end
+    return allocation
+
+
+def weekly_mileage(phases, mileage_range):
+    """Mileage per week: linear build to peak, periodic cutbacks, stepped taper"""
+    low, high = mileage_range
+    building = [i for i, phase in enumerate(phases) if phase != 'taper']
+    tapering = [i for i, phase in enumerate(phases) if phase == 'taper']
+
+    mileage = [0.0] * len(phases)
+    for position, i in enumerate(building):
+        progress = position / (len(building) - 1) if len(building) > 1 else 1.0
+        miles = low + (high - low) * progress
+        if (position + 1) % CUTBACK_EVERY == 0 and position != len(building) - 1:
+            miles *= CUTBACK_FACTOR
+        mileage[i] = miles
+    for position, i in enumerate(tapering):
+        progress = position / (len(tapering) - 1) if len(tapering) > 1 else 0.0
+        mileage[i] = high * (TAPER_START_FACTOR + (TAPER_END_FACTOR - TAPER_START_FACTOR) * progress)
+    return mileage
+
+
+def _round_miles(miles):
+    """Round to the nearest half mile, at least one mile"""
+    return max(1.0, round(miles * 2) / 2)
+
+
+def work_miles(work, count):
+    """Miles covered by `count` units of a session, recoveries included"""
+    return count * work.miles + (count - 1) * work.recovery
+
+
+def size_work(work, distance):
+    """(units, day distance) for a session on a day of `distance` miles
+
+    As many units as fit after the warm-up and cool-down, capped at
+    work.most; a day too short for work.fewest is lengthened to fit them.
+    """
+    available = distance - WARMUP_COOLDOWN_MILES
+    count = min(work.most, math.floor((available + work.recovery) / (work.miles + work.recovery) + 1e-9))
+    if count < work.fewest:
+        count = work.fewest
+        distance = math.ceil((work_miles(work, count) + WARMUP_COOLDOWN_MILES) * 2) / 2
+    return count, distance
+
+
+@lru_cache(maxsize=256)
+def compile_plan(plan_type, weeks):
+    """Compile a plan type into one WeekSkeleton per week (cached)"""
+    template = PLAN_TEMPLATES[plan_type]
+    phases = allocate_phases(template['phases'], weeks)
+    mileage = weekly_mileage(phases, template['mileage'])
+
+    skeletons = []
+    for week_index, (phase, miles) in enumerate(zip(phases, mileage)):
+        days = [TemplateDay(*entry) for entry in template['weeks'][phase]]
+        # Normalize shares so templates don't need to sum to exactly 1
+        total_share = sum(day.share for day in days)
+        workouts = []
+        for day in days:
+            distance = _round_miles(miles * day.share / total_share)
+            description = day.description
+            if day.work is not None:
+                count, distance = size_work(day.work, distance)
+                description = description.replace('{count}', f'{count * day.work.step:g}')
+            workouts.append(WorkoutSkeleton(
+                day=day.day,
+                workout_type=day.workout_type,
+                description=description.replace('{distance}', f'{distance:g}'),
+                distance=distance,
+                pace_zone=WORKOUT_PACE_ZONES[day.workout_type],
+            ))
+        skeletons.append(WeekSkeleton(week_index + 1, phase, round(miles, 1), tuple(workouts)))
+    return tuple(skeletons)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import TrainingPlan, Workout
+from .models import PlanGenerationJob, TrainingPlan, Workout
 
 class WorkoutSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,4 +12,12 @@ class TrainingPlanSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrainingPlan
         fields = ['id', 'name', 'plan_type', 'duration_weeks', 'target_vdot', 
-                 'created_at', 'is_active', 'workouts'] 
\ No newline at end of file
+                 'created_at', 'is_active', 'workouts']
+
+class PlanGenerationJobSerializer(serializers.ModelSerializer):
+    plan = TrainingPlanSerializer(read_only=True)
+    
+    class Meta:
+        model = PlanGenerationJob
+        fields = ['id', 'status', 'plan_type', 'target_vdot', 'weeks', 'plan',
+                 'error', 'created_at', 'updated_at']
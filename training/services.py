@@ -1,61 +1,112 @@
-
 # training/services.py
-from .models import TrainingPlan, Workout
+import math
+
+import numpy as np
+from django.db import transaction
+
+from .models import RaceResult, TrainingPlan, Workout
+from .plan_templates import compile_plan
+from calculator.environment import normalized_vdots
 from calculator.services import VDOTCalculator
 
 class TrainingPlanGenerator:
     """Generate structured training plans based on VDOT"""
-    
+
     def create_plan(self, user, plan_type, target_vdot, weeks):
-        """Create a complete training plan"""
-        
-        plan = TrainingPlan.objects.create(
+        """Create a complete training plan
+
+        Workouts are built in memory from the compiled plan template and
+        written with a single bulk_create, so a plan costs a constant
+        number of queries.
+        """
+        target_vdot = float(target_vdot)
+        weeks = int(weeks)
+
+        plan = TrainingPlan(
             user=user,
             name=f"{plan_type.replace('_', ' ').title()} Training Plan",
             plan_type=plan_type,
             duration_weeks=weeks,
             target_vdot=target_vdot
         )
-        
-        # Generate workouts for each week
-        for week in range(1, weeks + 1):
-            self._generate_week(plan, week, plan_type, target_vdot)
-        
+
+        # Paces only depend on the VDOT, so compute them once per plan
+        paces = VDOTCalculator.training_paces_for_vdot(target_vdot)
+        workouts = self.build_workouts(plan, paces)
+
+        with transaction.atomic():
+            plan.save()
+            Workout.objects.bulk_create(workouts)
+
         return plan
+
+    def build_workouts(self, plan, paces):
+        """Build (unsaved) workouts for every week from the compiled plan template"""
+        workouts = []
+        for week in compile_plan(plan.plan_type, plan.duration_weeks):
+            notes = f"{week.phase.title()} phase, {week.mileage:g} miles this week"
+            for skeleton in week.workouts:
+                workouts.append(Workout(
+                    training_plan=plan,
+                    week=week.week,
+                    day=skeleton.day,
+                    workout_type=skeleton.workout_type,
+                    description=skeleton.description.format_map(paces),
+                    distance=skeleton.distance,
+                    target_pace=paces[skeleton.pace_zone],
+                    notes=notes
+                ))
+        return workouts
+
+class RaceHistoryNormalizer:
+    """Score race results as if run flat in neutral weather"""
     
-    def _generate_week(self, plan, week_num, plan_type, vdot):
-        """Generate workouts for a specific week"""
-        paces = VDOTCalculator.get_training_paces(vdot)
+    @staticmethod
+    def normalized_vdots(race_results):
+        """Condition-normalized VDOTs for race results, in one vectorized pass
         
-        # Base weekly structure
-        if plan_type == '5k':
-            self._create_5k_week(plan, week_num, paces)
-        elif plan_type == '10k':
-            self._create_10k_week(plan, week_num, paces)
-        elif plan_type == 'half_marathon':
-            self._create_half_marathon_week(plan, week_num, paces)
-        elif plan_type == 'marathon':
-            self._create_marathon_week(plan, week_num, paces)
+        Results without a usable distance get NaN.
+        """
+        race_results = list(race_results)
+        distances = np.array([result.distance_meters or np.nan for result in race_results], dtype=np.float64)
+        valid = distances > 0
+        vdots = np.full(len(race_results), np.nan)
+        if valid.any():
+            columns = {
+                name: np.array([getattr(result, name) for result in race_results], dtype=np.float64)[valid]
+                for name in ('time_seconds', 'temperature', 'humidity', 'elevation_gain')
+            }
+            vdots[valid] = normalized_vdots(
+                columns['time_seconds'], distances[valid], columns['temperature'],
+                columns['humidity'], columns['elevation_gain']
+            )
+        return vdots
     
-    def _create_5k_week(self, plan, week, paces):
-        """Create 5K focused training week"""
-        workouts = [
-            (1, 'easy', f"Easy run 4-6 miles at {paces['easy']} pace", 5.0),
-            (2, 'interval', f"5x1000m at {paces['interval']} pace with 400m jog recovery", 6.0),
-            (3, 'easy', f"Easy run 3-4 miles at {paces['easy']} pace", 3.5),
-            (4, 'threshold', f"20 minutes at {paces['threshold']} pace", 4.0),
-            (5, 'easy', f"Easy run 3-4 miles at {paces['easy']} pace", 3.5),
-            (6, 'repetition', f"8x200m at {paces['repetition']} pace with 200m walk", 4.0),
-            (7, 'long', f"Long run at {paces['easy']} pace", 8.0),
-        ]
-        
-        for day, workout_type, description, distance in workouts:
-            Workout.objects.create(
-                training_plan=plan,
-                week=week,
-                day=day,
-                workout_type=workout_type,
-                description=description,
-                distance=distance,
-                target_pace=paces.get(workout_type, paces['easy'])
-            )
\ No newline at end of file
+    @staticmethod
+    def renormalize(queryset=None, batch_size=1000):
+        """Recompute calculated_vdot for race results from their conditions"""
+        if queryset is None:
+            queryset = RaceResult.objects.all()
+        race_results = queryset.only(
+            'id', 'distance', 'custom_distance', 'time_seconds',
+            'temperature', 'humidity', 'elevation_gain', 'calculated_vdot'
+        )
+        chunk, updated = [], 0
+        for result in race_results.iterator(chunk_size=batch_size):
+            chunk.append(result)
+            if len(chunk) >= batch_size:
+                updated += RaceHistoryNormalizer._renormalize_chunk(chunk)
+                chunk = []
+        if chunk:
+            updated += RaceHistoryNormalizer._renormalize_chunk(chunk)
+        return updated
+    
+    @staticmethod
+    def _renormalize_chunk(race_results):
+        """Write changed VDOTs for one chunk; returns the number of rows updated"""
+        updated = []
+        for result, vdot in zip(race_results, RaceHistoryNormalizer.normalized_vdots(race_results).tolist()):
+            if not math.isnan(vdot) and vdot != result.calculated_vdot:
+                result.calculated_vdot = vdot
+                updated.append(result)
+        return RaceResult.objects.bulk_update(updated, ['calculated_vdot'])
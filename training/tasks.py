@@ -0,0 +1,122 @@
+# training/tasks.py
+"""Background execution of PlanGenerationJob
+
+Jobs run on Celery when PLAN_GENERATION_BACKEND is 'celery' and the broker
+accepts the task; otherwise (or if the broker is unreachable) they run on
+a small in-process thread pool. Jobs that stay pending or running past
+PLAN_GENERATION_JOB_TIMEOUT (a lost task or a worker that died) are
+failed so the request can be submitted again.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import PlanGenerationJob
+from .services import TrainingPlanGenerator
+
+logger = logging.getLogger(__name__)
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+
+def run_plan_generation_job(job_id):
+    """Generate the plan for a pending job and record the outcome"""
+    close_old_connections()
+    try:
+        # Claim the job atomically so a retried task can't build it twice.
+        # update() skips auto_now, so stamp updated_at or the claim looks stale
+        claimed = PlanGenerationJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+        job = PlanGenerationJob.objects.select_related('user').get(pk=job_id)
+        # Outcomes only land on a job that is still ours; expire_stale_jobs
+        # may have failed it (and a resubmission replaced it) meanwhile
+        running = PlanGenerationJob.objects.filter(pk=job_id, status='running')
+        try:
+            with transaction.atomic():
+                plan = TrainingPlanGenerator().create_plan(
+                    user=job.user,
+                    plan_type=job.plan_type,
+                    target_vdot=job.target_vdot,
+                    weeks=job.weeks
+                )
+                if not running.update(status='completed', plan=plan, updated_at=timezone.now()):
+                    # Don't leave a second copy of the plan the replacement job builds
+                    transaction.set_rollback(True)
+                    logger.warning('Plan generation job %s expired before completing', job_id)
+        except Exception as e:
+            logger.exception('Plan generation job %s failed', job_id)
+            running.update(status='failed', error=str(e), updated_at=timezone.now())
+    finally:
+        close_old_connections()
+
+
+if shared_task is not None:
+    @shared_task(name='training.generate_plan')
+    def generate_plan_task(job_id):
+        run_plan_generation_job(job_id)
+else:
+    generate_plan_task = None
+
+
+@lru_cache(maxsize=None)
+def _get_executor():
+    return ThreadPoolExecutor(
+        max_workers=getattr(settings, 'PLAN_GENERATION_THREADS', 2),
+        thread_name_prefix='plan-generation',
+    )
+
+
+def enqueue_plan_generation(job):
+    """Dispatch a job to Celery, falling back to the local thread pool"""
+    if generate_plan_task is not None and getattr(settings, 'PLAN_GENERATION_BACKEND', 'thread') == 'celery':
+        try:
+            generate_plan_task.delay(str(job.pk))
+            return
+        except Exception:
+            logger.warning('Celery broker unavailable, generating plan %s locally', job.pk, exc_info=True)
+    _get_executor().submit(run_plan_generation_job, job.pk)
+
+
+def expire_stale_jobs(**filters):
+    """Fail active jobs not updated within PLAN_GENERATION_JOB_TIMEOUT; returns how many"""
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'PLAN_GENERATION_JOB_TIMEOUT', 600))
+    return PlanGenerationJob.objects.filter(
+        status__in=PlanGenerationJob.ACTIVE_STATUSES, updated_at__lt=cutoff, **filters
+    ).update(status='failed', error='Timed out before completing', updated_at=now)
+
+
+def submit_plan_generation(user, plan_type, target_vdot, weeks):
+    """Create and enqueue a job, reusing an identical in-flight job for this user
+
+    Returns (job, created). The partial unique constraint on active jobs
+    makes concurrent duplicate submissions collapse onto one job; a stale
+    in-flight job is failed first instead of being reused.
+    """
+    params = {'user': user, 'plan_type': plan_type, 'target_vdot': target_vdot, 'weeks': weeks}
+    expire_stale_jobs(**params)
+    for _ in range(2):
+        job = PlanGenerationJob.objects.filter(
+            status__in=PlanGenerationJob.ACTIVE_STATUSES, **params
+        ).first()
+        if job is not None:
+            return job, False
+        try:
+            with transaction.atomic():
+                job = PlanGenerationJob.objects.create(**params)
+        except IntegrityError:
+            continue  # lost the race to a concurrent request; reuse its job
+        transaction.on_commit(lambda: enqueue_plan_generation(job))
+        return job, True
+    raise IntegrityError('Could not create plan generation job')
@@ -0,0 +1,273 @@
+# training/tests.py
+import csv
+import json
+import re
+from unittest import mock
+from datetime import date, timedelta
+from io import StringIO
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from calculator.services import VDOTCalculator
+
+from .exports import CSV_COLUMNS, _ics_line
+from .models import PlanGenerationJob, RaceResult, TrainingPlan, Workout
+from .services import RaceHistoryNormalizer, TrainingPlanGenerator
+from .plan_templates import PLAN_TEMPLATES, WARMUP_COOLDOWN_MILES, TemplateDay, compile_plan, work_miles
+from .tasks import run_plan_generation_job, submit_plan_generation
+
+User = get_user_model()
+
+
+class GeneratePlanInputTests(APITestCase):
+    url = '/api/training/plans/generate_plan/'
+
+    def setUp(self):
+        self.user = User.objects.create(username='runner', email='runner@example.com')
+        self.client.force_authenticate(self.user)
+
+    def test_generates_plan(self):
+        response = self.client.post(self.url, {'plan_type': '5k', 'target_vdot': '45.5', 'weeks': 8}, format='json')
+        self.assertEqual(response.status_code, 201)
+        plan = TrainingPlan.objects.get(user=self.user)
+        self.assertEqual((plan.target_vdot, plan.duration_weeks), (45.5, 8))
+
+    def test_target_vdot_must_be_finite_and_on_the_chart(self):
+        for target_vdot in ('nan', 'inf', 29, 86, None, 'fast'):
+            response = self.client.post(
+                self.url, {'plan_type': '5k', 'target_vdot': target_vdot, 'weeks': 8}, format='json'
+            )
+            self.assertEqual(response.status_code, 400, target_vdot)
+            self.assertEqual(response.data['field'], 'target_vdot')
+
+    def test_weeks_and_plan_type_are_bounded(self):
+        for plan_type, weeks in (('5k', 0), ('5k', 53), ('5k', 100000), ('5k', 'many'), ('ultra', 12)):
+            response = self.client.post(
+                self.url, {'plan_type': plan_type, 'target_vdot': 50, 'weeks': weeks}, format='json'
+            )
+            self.assertEqual(response.status_code, 400, (plan_type, weeks))
+        self.assertFalse(TrainingPlan.objects.exists())
+
+
+class SubmitPlanGenerationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='runner', email='runner@example.com')
+        self.params = {'user': self.user, 'plan_type': '10k', 'target_vdot': 50.0, 'weeks': 10}
+
+    def test_reuses_in_flight_job(self):
+        job, created = submit_plan_generation(**self.params)
+        self.assertTrue(created)
+        self.assertEqual(submit_plan_generation(**self.params), (job, False))
+
+    @override_settings(PLAN_GENERATION_JOB_TIMEOUT=600)
+    def test_stale_job_is_failed_and_replaced(self):
+        for stuck_status in PlanGenerationJob.ACTIVE_STATUSES:
+            with self.subTest(status=stuck_status):
+                stale = PlanGenerationJob.objects.create(**self.params)
+                PlanGenerationJob.objects.filter(pk=stale.pk).update(
+                    status=stuck_status, updated_at=timezone.now() - timedelta(seconds=601)
+                )
+                job, created = submit_plan_generation(**self.params)
+                self.assertTrue(created)
+                self.assertNotEqual(job.pk, stale.pk)
+                stale.refresh_from_db()
+                self.assertEqual(stale.status, 'failed')
+                self.assertTrue(stale.error)
+                PlanGenerationJob.objects.filter(pk=job.pk).update(status='completed')
+
+
+class RunPlanGenerationJobTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='runner', email='runner@example.com')
+        self.job = PlanGenerationJob.objects.create(user=self.user, plan_type='10k', target_vdot=50.0, weeks=10)
+        PlanGenerationJob.objects.filter(pk=self.job.pk).update(updated_at=timezone.now() - timedelta(days=1))
+
+    def test_claim_refreshes_updated_at(self):
+        claimed_at = []
+        create_plan = TrainingPlanGenerator.create_plan
+
+        def spy(generator, **kwargs):
+            claimed_at.append(PlanGenerationJob.objects.get(pk=self.job.pk).updated_at)
+            return create_plan(generator, **kwargs)
+
+        with mock.patch.object(TrainingPlanGenerator, 'create_plan', spy):
+            run_plan_generation_job(self.job.pk)
+        self.assertGreater(claimed_at[0], timezone.now() - timedelta(minutes=1))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'completed')
+        self.assertIsNotNone(self.job.plan)
+
+    def expire_after_claim(self, job):
+        """Fail the job just after it is claimed, as expire_stale_jobs would"""
+        select_related = PlanGenerationJob.objects.select_related
+
+        def expire(*fields):
+            PlanGenerationJob.objects.filter(pk=job.pk).update(status='failed', error='Timed out')
+            return select_related(*fields)
+
+        return mock.patch.object(PlanGenerationJob.objects, 'select_related', expire)
+
+    def test_expired_job_is_not_resurrected(self):
+        with self.expire_after_claim(self.job), self.assertLogs('training.tasks', 'WARNING'):
+            run_plan_generation_job(self.job.pk)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.plan), ('failed', None))
+        self.assertFalse(TrainingPlan.objects.exists())
+
+        with self.expire_after_claim(self.job), \
+                mock.patch.object(TrainingPlanGenerator, 'create_plan', side_effect=ValueError('boom')), \
+                self.assertLogs('training.tasks', 'ERROR'):
+            PlanGenerationJob.objects.filter(pk=self.job.pk).update(status='pending')
+            run_plan_generation_job(self.job.pk)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.error, 'Timed out')
+
+class PlanExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='runner', email='runner@example.com')
+        self.client.force_authenticate(self.user)
+        self.plan = TrainingPlanGenerator().create_plan(self.user, '5k', 45.0, 2)
+        self.workouts = list(Workout.objects.filter(training_plan=self.plan).order_by('week', 'day'))
+        self.url = f'/api/training/plans/{self.plan.pk}/export/'
+
+    def export(self, url=None, **params):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv(self):
+        response, content = self.export(start='2024-01-01')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn(f'training-plan-{self.plan.pk}.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(tuple(rows[0]), CSV_COLUMNS)
+        self.assertEqual(len(rows), len(self.workouts))
+        for row, workout in zip(rows, self.workouts):
+            expected = date(2024, 1, 1) + timedelta(weeks=workout.week - 1, days=workout.day - 1)
+            self.assertEqual((row['date'], row['description']), (expected.isoformat(), workout.description))
+
+    def test_dates_default_to_the_plan_start(self):
+        _, content = self.export(file_format='jsonl')
+        first = json.loads(content.splitlines()[0])
+        self.assertEqual(first['date'], self.plan.created_at.date().isoformat())
+
+    def test_jsonl(self):
+        response, content = self.export('/api/training/plans/export_all/', file_format='jsonl')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), len(self.workouts))
+        self.assertEqual(list(rows[0]), list(CSV_COLUMNS))
+        self.assertEqual(rows[-1]['target_pace'], self.workouts[-1].target_pace)
+
+    def test_icalendar(self):
+        response, content = self.export(file_format='ics', start='2024-01-01')
+        self.assertEqual(response['Content-Type'], 'text/calendar')
+        lines = content.split('\r\n')
+        self.assertEqual((lines[0], lines[-2], lines[-1]), ('BEGIN:VCALENDAR', 'END:VCALENDAR', ''))
+        self.assertEqual(lines.count('BEGIN:VEVENT'), len(self.workouts))
+        self.assertIn('DTSTART;VALUE=DATE:20240101', lines)
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in lines))
+
+    def test_rejects_unknown_format_and_bad_start(self):
+        for params in ({'file_format': 'xlsx'}, {'start': '2024-13-01'}, {'start': 'soon'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.data['error'])
+
+
+class IcsFoldingTests(SimpleTestCase):
+
+    def test_long_multibyte_lines_fold_between_characters(self):
+        line = 'DESCRIPTION:' + 'Tempo à 4:10/km – relax ' * 10
+        folded = _ics_line(line)
+        physical = folded[:-2].split('\r\n')
+        self.assertGreater(len(physical), 1)
+        self.assertTrue(all(len(part.encode('utf-8')) <= 75 for part in physical))
+        self.assertTrue(all(part.startswith(' ') for part in physical[1:]))
+        self.assertEqual(folded.replace('\r\n ', ''), line + '\r\n')
+
+
+class RaceHistoryNormalizerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='runner', email='runner@example.com')
+
+    def race(self, **fields):
+        values = {'user': self.user, 'distance': '10K', 'time_seconds': 2700, 'race_date': date(2024, 5, 1)}
+        values.update(fields)
+        return RaceResult(**values)
+
+    def test_vectorized_vdots_match_the_calculator(self):
+        races = [self.race(), self.race(distance='custom', custom_distance=8000, time_seconds=2000),
+                 self.race(distance='custom'), self.race(temperature=85, humidity=80, elevation_gain=600)]
+        vdots = RaceHistoryNormalizer.normalized_vdots(races)
+        self.assertAlmostEqual(vdots[0], VDOTCalculator.calculate_vdot(2700, 10000))
+        self.assertAlmostEqual(vdots[1], VDOTCalculator.calculate_vdot(2000, 8000))
+        self.assertTrue(np.isnan(vdots[2]))
+        # Slowed by heat and hills, so the same time is worth more
+        self.assertGreater(vdots[3], vdots[0])
+
+    def test_save_scores_the_race_for_its_conditions(self):
+        race = self.race(temperature=85, humidity=80)
+        race.save()
+        self.assertGreater(race.calculated_vdot, VDOTCalculator.calculate_vdot(2700, 10000))
+        race.temperature = None
+        race.save(update_fields=['temperature'])
+        race.refresh_from_db()
+        self.assertAlmostEqual(race.calculated_vdot, VDOTCalculator.calculate_vdot(2700, 10000))
+
+    def test_renormalize_updates_stale_rows_in_chunks(self):
+        for temperature in (None, 70, 85, 95, 100):
+            self.race(temperature=temperature).save()
+        RaceResult.objects.update(calculated_vdot=0)
+        # One streamed SELECT, then an UPDATE per chunk
+        with self.assertNumQueries(4):
+            self.assertEqual(RaceHistoryNormalizer.renormalize(batch_size=2), 5)
+        self.assertEqual(RaceHistoryNormalizer.renormalize(batch_size=2), 0)
+        out = StringIO()
+        RaceResult.objects.update(calculated_vdot=0)
+        call_command('renormalize_race_results', batch_size=2, stdout=out)
+        self.assertIn('5 race results', out.getvalue())
+
+
+def _template_pattern(description):
+    """Regex matching a compiled description, capturing its {count}"""
+    pattern = re.escape(description).replace(r'\{count\}', r'(?P<count>\d+)')
+    return re.compile(re.sub(r'\\\{\w+\\\}', r'.+?', pattern))
+
+
+class PlanTemplateTests(SimpleTestCase):
+
+    def test_quality_sessions_fit_their_day(self):
+        for plan_type, template in PLAN_TEMPLATES.items():
+            for weeks in range(1, 53):
+                for week in compile_plan(plan_type, weeks):
+                    days = [TemplateDay(*entry) for entry in template['weeks'][week.phase]]
+                    for day, workout in zip(days, week.workouts):
+                        self.assertNotIn('{count}', workout.description)
+                        if day.work is None:
+                            continue
+                        count = int(_template_pattern(day.description).fullmatch(workout.description)['count'])
+                        count //= day.work.step
+                        self.assertGreaterEqual(
+                            workout.distance, work_miles(day.work, count) + WARMUP_COOLDOWN_MILES - 1e-9,
+                            (plan_type, weeks, week.week, workout.description),
+                        )
+
+    def test_sessions_scale_with_the_day(self):
+        marathon = compile_plan('marathon', 16)[10].workouts
+        self.assertEqual(marathon[1].description, '9.5 miles with 8 at {marathon} pace')
+        half = compile_plan('half_marathon', 12)[7].workouts
+        self.assertEqual(half[3].description, '2x2 miles at {threshold} pace with 2 minute rest')
+        self.assertEqual(half[3].distance, 5.5)
+        # The template's full session once the day is long enough
+        self.assertEqual(marathon[6].description, 'Long run 15.5 miles with the last 6 at {marathon} pace')
@@ -6,6 +6,7 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'plans', views.TrainingPlanViewSet, basename='training-plans')
+router.register(r'jobs', views.PlanGenerationJobViewSet, basename='training-jobs')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,15 +1,24 @@
-
 # training/views.py
+from datetime import date
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from .models import TrainingPlan, Workout
-from .serializers import TrainingPlanSerializer, WorkoutSerializer
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from calculator.parsing import ParseError, parse_vdot
+from .exports import EXPORT_FIELDS, EXPORT_FORMATS
+from .models import PlanGenerationJob, TrainingPlan, Workout
+from .serializers import PlanGenerationJobSerializer, TrainingPlanSerializer, WorkoutSerializer
 from .services import TrainingPlanGenerator
+from .tasks import submit_plan_generation
 
 User = get_user_model()
 
+PLAN_TYPES = {plan_type for plan_type, _ in TrainingPlan.PLAN_TYPES}
+MIN_PLAN_WEEKS = 1
+MAX_PLAN_WEEKS = 52
+
 class TrainingPlanViewSet(viewsets.ModelViewSet):
     serializer_class = TrainingPlanSerializer
     
@@ -18,11 +27,40 @@ class TrainingPlanViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def generate_plan(self, request):
-        """Generate a new training plan"""
+        """Generate a new training plan
+        
+        With "async": true the plan is generated in the background and the
+        response is 202 with a job to poll at /api/training/jobs/<id>/.
+        """
         data = request.data
         plan_type = data.get('plan_type')
-        target_vdot = data.get('target_vdot')
-        weeks = data.get('weeks', 12)
+        
+        try:
+            target_vdot = parse_vdot(data.get('target_vdot'), field='target_vdot')
+        except ParseError as e:
+            return Response(e.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        try:
+            weeks = int(data.get('weeks', 12))
+        except (TypeError, ValueError):
+            return Response({'error': 'weeks must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if plan_type not in PLAN_TYPES:
+            return Response({'error': 'Invalid plan type'}, status=status.HTTP_400_BAD_REQUEST)
+        if not MIN_PLAN_WEEKS <= weeks <= MAX_PLAN_WEEKS:
+            return Response({'error': f'weeks must be between {MIN_PLAN_WEEKS} and {MAX_PLAN_WEEKS}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        if str(data.get('async', '')).lower() in ('true', '1'):
+            job, _ = submit_plan_generation(
+                user=request.user,
+                plan_type=plan_type,
+                target_vdot=target_vdot,
+                weeks=weeks
+            )
+            response = PlanGenerationJobSerializer(job).data
+            response['status_url'] = request.build_absolute_uri(
+                reverse('training-jobs-detail', args=[job.pk])
+            )
+            return Response(response, status=status.HTTP_202_ACCEPTED)
         
         generator = TrainingPlanGenerator()
         plan = generator.create_plan(
@@ -33,4 +71,46 @@ class TrainingPlanViewSet(viewsets.ModelViewSet):
         )
         
         serializer = self.get_serializer(plan)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Stream one plan's workouts as CSV, iCalendar or JSON Lines"""
+        plan = self.get_object()
+        return self._export_response(request, Workout.objects.filter(training_plan=plan),
+                                     f'training-plan-{plan.pk}')
+    
+    @action(detail=False, methods=['get'])
+    def export_all(self, request):
+        """Stream the workouts of all of the user's plans"""
+        return self._export_response(
+            request, Workout.objects.filter(training_plan__user=request.user), 'training-plans'
+        )
+    
+    def _export_response(self, request, workouts, filename):
+        """Build a streaming export from ?file_format=csv|ics|jsonl and optional ?start=YYYY-MM-DD"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response({'error': 'file_format must be one of csv, ics, jsonl'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        start_date = None
+        if request.query_params.get('start'):
+            try:
+                start_date = date.fromisoformat(request.query_params['start'])
+            except ValueError:
+                return Response({'error': 'start must be a YYYY-MM-DD date'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        
+        stream, content_type, extension = EXPORT_FORMATS[file_format]
+        # Rows are fetched in chunks straight from the cursor, never as a full list
+        rows = workouts.order_by('training_plan_id', 'week', 'day').values(*EXPORT_FIELDS).iterator(chunk_size=2000)
+        response = StreamingHttpResponse(stream(rows, start_date), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+        return response
+
+class PlanGenerationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status and result of background plan generation jobs"""
+    serializer_class = PlanGenerationJobSerializer
+    
+    def get_queryset(self):
+        return PlanGenerationJob.objects.filter(user=self.request.user).select_related('plan')